@@ -19,6 +19,7 @@ from tkinter import ttk, simpledialog, messagebox
 import sys
 import signal
 import atexit
+import logging
 from collections import deque
 import numpy as np
 
@@ -595,6 +596,10 @@ class FloatingSubtitles:
                     if config.ENABLE_DEBUG_LOGGING:
                         print(f"Error cleaning transcriber: {e}")
                         
+            # Flush the history backup journal
+            if hasattr(self, 'history_manager'):
+                self.history_manager.close_backup()
+                
             # Clean up MLX cache
             try:
                 mx.clear_cache()
@@ -621,7 +626,8 @@ class FloatingSubtitles:
                         # Get the most recent 1 second of audio for volume calculation
                         recent_samples = min(self.transcriber.sample_rate, len(self.transcriber.continuous_buffer.buffer))
                         recent_audio = self.transcriber.continuous_buffer.buffer[-recent_samples:]
-                        volume = float(np.sqrt(np.mean(recent_audio.astype(np.float64)**2))) if len(recent_audio) > 0 else 0.0
+                        # Buffer holds int16 PCM, normalize to [-1, 1] for the RMS
+                        volume = float(np.sqrt(np.mean(recent_audio.astype(np.float64)**2))) / 32768.0 if len(recent_audio) > 0 else 0.0
             
             # Convert to percentage (0-100)
             volume_percent = min(volume * 1000, 100)  # Scale factor for visibility
@@ -731,6 +737,17 @@ class FloatingSubtitles:
 def main():
     """Main function to run Online-Translator with comprehensive error handling"""
     app = None
+    
+    # Module debug output (logging.debug) follows the debug logging setting. Only the
+    # app's own loggers are raised; third-party libraries stay at WARNING on the root
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    app_logger = logging.getLogger(__package__)
+    app_logger.setLevel(logging.DEBUG if config.ENABLE_DEBUG_LOGGING else logging.WARNING)
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter("%(message)s"))
+    app_logger.addHandler(log_handler)
+    app_logger.propagate = False
+    
     try:
         print("🎬 Starting Online-Translator - Live Assistant")
         print("❤️  Created with love by Kiko Cisneros for his children")
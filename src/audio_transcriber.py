@@ -24,16 +24,63 @@ import os
 import signal
 from pathlib import Path
 import json
+import functools
+import operator
 
 # Handle imports for both module and standalone usage
 try:
     from . import config
     from .lightweight_llm import LightweightLLM
-    from .continuous_buffer import ContinuousBuffer
+    from .continuous_buffer import ContinuousBuffer, pcm16_to_float32
 except ImportError:
     import config
     from lightweight_llm import LightweightLLM
-    from continuous_buffer import ContinuousBuffer
+    from continuous_buffer import ContinuousBuffer, pcm16_to_float32
+
+
+# Device name classification: every keyword is tagged with a category bit and
+# all of them are compiled into a single pattern, so a device name is lowered
+# once and scanned once for all categories.
+DEVICE_MICROPHONE = 1
+DEVICE_BUILTIN = 2
+DEVICE_SYSTEM_AUDIO = 4
+DEVICE_BLACKHOLE = 8
+
+_DEVICE_KEYWORDS = {
+    'microphone': DEVICE_MICROPHONE, 'mic': DEVICE_MICROPHONE,
+    'internal': DEVICE_MICROPHONE, 'usb': DEVICE_MICROPHONE,
+    'bluetooth': DEVICE_MICROPHONE, 'airpods': DEVICE_MICROPHONE,
+    'headset': DEVICE_MICROPHONE,
+    'built-in': DEVICE_MICROPHONE | DEVICE_BUILTIN,
+    'micrófono': DEVICE_MICROPHONE | DEVICE_BUILTIN,
+    'interno': DEVICE_BUILTIN,
+    'capture screen': DEVICE_SYSTEM_AUDIO, 'pantalla': DEVICE_SYSTEM_AUDIO,
+    'screen capture': DEVICE_SYSTEM_AUDIO, 'system audio': DEVICE_SYSTEM_AUDIO,
+    'blackhole': DEVICE_BLACKHOLE,
+}
+
+# A keyword also carries the categories of any shorter keyword it contains,
+# since the longest match at a position shadows the shorter ones
+_DEVICE_KEYWORD_MASKS = {
+    keyword: functools.reduce(
+        operator.or_, (mask for other, mask in _DEVICE_KEYWORDS.items() if other in keyword)
+    )
+    for keyword in _DEVICE_KEYWORDS
+}
+
+# Zero-width lookahead so overlapping keywords are all reported
+_DEVICE_KEYWORD_PATTERN = re.compile(
+    '(?=(' + '|'.join(re.escape(k) for k in sorted(_DEVICE_KEYWORD_MASKS, key=len, reverse=True)) + '))'
+)
+
+
+@functools.lru_cache(maxsize=64)
+def classify_device_name(device_name):
+    """Return a bitmask of DEVICE_* categories matched by a device name"""
+    mask = 0
+    for match in _DEVICE_KEYWORD_PATTERN.finditer(device_name.lower()):
+        mask |= _DEVICE_KEYWORD_MASKS[match.group(1)]
+    return mask
 
 
 class RealTimeTranscriber:
@@ -46,7 +93,8 @@ class RealTimeTranscriber:
         self.chunk_size = int(self.sample_rate * self.chunk_duration)
         
         # ✅ MEJORAR MANEJO DE SEÑALES PARA CIERRE LIMPIO
-        self._shutdown_requested = False
+        # Event-driven shutdown: worker threads wait on this instead of sleeping
+        self._shutdown_event = threading.Event()
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
         
@@ -126,6 +174,17 @@ class RealTimeTranscriber:
         
         print("🚀 Enhanced real-time transcriber initialized and ready")
     
+    @property
+    def _shutdown_requested(self):
+        """Whether a shutdown has been requested (backed by the shutdown event)"""
+        return self._shutdown_event.is_set()
+    
+    @_shutdown_requested.setter
+    def _shutdown_requested(self, value):
+        if value:
+            self._shutdown_event.set()
+        else:
+            self._shutdown_event.clear()
 
     def _process_transcribed_text(self, new_text):
         """Enhanced text processing with improved concatenation logic"""
@@ -335,9 +394,12 @@ class RealTimeTranscriber:
                 new_audio = self.continuous_buffer.get_new_audio_for_transcription()
                 
                 if len(new_audio) == 0:
-                    time.sleep(0.05)  # ✅ OPTIMIZED: Balanced polling
+                    self._shutdown_event.wait(0.05)  # ✅ OPTIMIZED: Balanced polling
                     continue
                 
+                # Buffer holds int16 PCM; convert once per transcription tick
+                new_audio = pcm16_to_float32(new_audio)
+                
                 # Calculate duration and audio level
                 audio_duration = len(new_audio) / self.sample_rate
                 
@@ -365,7 +427,7 @@ class RealTimeTranscriber:
                         print("✅ First transcription complete - switching to enhanced real-time mode")
                         continue
                     else:
-                        time.sleep(0.1)
+                        self._shutdown_event.wait(0.1)
                         continue
                 
                 # Enhanced silence detection with word boundary awareness
@@ -459,12 +521,12 @@ class RealTimeTranscriber:
                             self.continuous_buffer.clear_transcribed_audio(keep_samples=overlap_keep_samples)
                             print(f"🧹 Enhanced buffer cleanup, kept {overlap_keep_samples/self.sample_rate:.1f}s overlap")
                 
-                # ✅ ENHANCED: More responsive sleep
-                time.sleep(0.05)  # Balanced polling
+                # ✅ ENHANCED: More responsive sleep (wakes immediately on shutdown)
+                self._shutdown_event.wait(0.05)  # Balanced polling
                 
             except Exception as e:
                 print(f"❌ Enhanced transcription worker error: {e}")
-                time.sleep(0.5)
+                self._shutdown_event.wait(0.5)
     
     def _validate_transcription_length(self, text, audio_duration):
         """Validate if the transcription length is reasonable for the audio duration"""
@@ -746,8 +808,8 @@ class RealTimeTranscriber:
             "-i", ffmpeg_input,
             "-ar", str(self.sample_rate),
             "-ac", "1",
-            "-acodec", "pcm_f32le",
-            "-f", "wav",
+            "-acodec", "pcm_s16le",
+            "-f", "s16le",
             "pipe:1"
         ]
         
@@ -774,15 +836,19 @@ class RealTimeTranscriber:
     
     def _audio_capture_worker(self):
         """Worker thread for capturing audio from ffmpeg"""
-        chunk_size = self.chunk_size * 4
+        chunk_size = self.chunk_size * 2  # 2 bytes per int16 sample
         
-        while self.is_recording and self.ffmpeg_process:
+        while self.is_recording and self.ffmpeg_process and not self._shutdown_event.is_set():
             try:
                 data = self.ffmpeg_process.stdout.read(chunk_size)
                 if not data:
                     break
                 
-                audio_chunk = np.frombuffer(data, dtype=np.float32)
+                # Drop a trailing odd byte (only possible on a short final read)
+                if len(data) % 2:
+                    data = data[:-1]
+                
+                audio_chunk = np.frombuffer(data, dtype=np.int16)
                 
                 if len(audio_chunk) > 0:
                     self.continuous_buffer.add_audio(audio_chunk)
@@ -873,14 +939,15 @@ class RealTimeTranscriber:
                         except ValueError:
                             continue
                         
-                        if 'blackhole' in device_name.lower():
+                        categories = classify_device_name(device_name)
+                        if categories & DEVICE_BLACKHOLE:
                             continue
                         
                         device_info = {
                             'name': device_name,
                             'index': device_index,
-                            'is_system_audio': self.is_system_audio_device(device_name),
-                            'is_microphone': self.is_microphone_device(device_name),
+                            'is_system_audio': bool(categories & DEVICE_SYSTEM_AUDIO),
+                            'is_microphone': bool(categories & DEVICE_MICROPHONE),
                             'device_type': 'audio'
                         }
                         devices.append(device_info)
@@ -909,19 +976,14 @@ class RealTimeTranscriber:
     
     def is_system_audio_device(self, device_name):
         """Check if device is likely a system audio capture device"""
-        system_indicators = [
-            'capture screen', 'pantalla', 'screen capture', 'system audio'
-        ]
-        device_lower = device_name.lower()
-        if 'blackhole' in device_lower:
+        categories = classify_device_name(device_name)
+        if categories & DEVICE_BLACKHOLE:
             return False
-        return any(indicator in device_lower for indicator in system_indicators)
+        return bool(categories & DEVICE_SYSTEM_AUDIO)
     
     def is_microphone_device(self, device_name):
         """Check if device is likely a microphone"""
-        mic_indicators = ['microphone', 'mic', 'built-in', 'internal', 'usb', 'bluetooth', 'airpods', 'headset', 'micrófono']
-        device_lower = device_name.lower()
-        return any(indicator in device_lower for indicator in mic_indicators)
+        return bool(classify_device_name(device_name) & DEVICE_MICROPHONE)
     
     def get_device_ffmpeg_input(self, device_name):
         """Get the correct ffmpeg input format for the device"""
@@ -980,7 +1042,7 @@ class RealTimeTranscriber:
             
         # ✅ LÓGICA MEJORADA: Priorizar micrófonos para transcripción de voz
         # 1. Primero buscar micrófonos integrados
-        builtin_mics = [d for d in self.audio_devices if 'built-in' in d['name'].lower() or 'interno' in d['name'].lower() or 'micrófono' in d['name'].lower()]
+        builtin_mics = [d for d in self.audio_devices if classify_device_name(d['name']) & DEVICE_BUILTIN]
         if builtin_mics:
             device_name = builtin_mics[0]['name']
             print(f"🎤 Auto-selected built-in microphone: {device_name}")
@@ -1010,7 +1072,7 @@ class RealTimeTranscriber:
                 return device_name
         
         # 4. Fallback a cualquier dispositivo que no sea BlackHole
-        non_blackhole_devices = [d for d in self.audio_devices if 'blackhole' not in d['name'].lower()]
+        non_blackhole_devices = [d for d in self.audio_devices if not classify_device_name(d['name']) & DEVICE_BLACKHOLE]
         if non_blackhole_devices:
             device_name = non_blackhole_devices[0]['name']
             print(f"🎧 Auto-selected fallback audio device: {device_name}")
@@ -1072,7 +1134,7 @@ class RealTimeTranscriber:
         """Manejo mejorado de señales para cierre limpio"""
         if not self._shutdown_requested:
             print(f"\n🛑 Recibida señal {signum}, cerrando limpiamente...")
-            self._shutdown_requested = True
+            self._shutdown_event.set()
             
             # Detener transcripción primero (más rápido)
             if self.processing_active:
@@ -1084,15 +1146,18 @@ class RealTimeTranscriber:
                 print("🛑 Deteniendo grabación...")
                 self.is_recording = False
                 
-            # Dar tiempo mínimo para que los threads vean las señales
-            time.sleep(0.5)
-            
-            # Forzar terminación de ffmpeg si sigue corriendo
+            # Forzar terminación de ffmpeg si sigue corriendo (desbloquea el read del audio thread)
             if self.ffmpeg_process:
                 try:
                     os.killpg(os.getpgid(self.ffmpeg_process.pid), signal.SIGTERM)
                 except:
                     pass
+            
+            # Los workers despiertan con el evento; esperar solo lo justo
+            current = threading.current_thread()
+            for thread in (self.audio_thread, self.transcription_thread):
+                if thread and thread.is_alive() and thread is not current:
+                    thread.join(timeout=0.3)
                     
             print("✅ Cierre limpio completado")
             # No llamar exit() directamente, dejar que la UI maneje el cierre
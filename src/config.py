@@ -33,6 +33,7 @@ MLX_GENERATION_CONFIG = {
 MIN_TRANSLATION_TOKENS = 10
 MAX_TRANSLATION_TOKENS = 100
 TRANSLATION_TOKEN_MULTIPLIER = 2  # Output tokens = input_words * multiplier + MIN_TOKENS
+TRANSLATION_BATCH_SIZE = 8  # Max prompts per batched generation pass in translate_batch
 
 # UI settings
 WINDOW_WIDTH_RATIO = 0.8
@@ -154,4 +155,5 @@ OVERLAP_DURATION = 0.2
 
 # Debug settings
 ENABLE_DEBUG_LOGGING = False
+ENABLE_TIMING_LOGGING = False  # Per-translation timing and stats lines in the console
 SHOW_PROCESSING_TIME = False 
\ No newline at end of file
@@ -14,6 +14,15 @@ Licensed under the MIT License (see LICENSE file for details)
 import threading
 import numpy as np
 
+# Audio is stored as 16-bit PCM (as delivered by ffmpeg) and only converted to
+# float32 when it is handed to Whisper or used for level calculations
+PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def pcm16_to_float32(audio):
+    """Convert 16-bit PCM samples to float32 in the [-1.0, 1.0) range"""
+    return audio.astype(np.float32) * PCM16_SCALE
+
 
 class ContinuousBuffer:
     """Manages continuous audio buffer for real-time transcription"""
@@ -21,7 +30,7 @@ class ContinuousBuffer:
     def __init__(self, sample_rate=16000, max_duration=30.0):
         self.sample_rate = sample_rate
         self.max_samples = int(max_duration * sample_rate)
-        self.buffer = np.array([], dtype=np.float32)
+        self.buffer = np.array([], dtype=np.int16)
         self.lock = threading.Lock()
         
         # Transcription overlap management
@@ -52,7 +61,7 @@ class ContinuousBuffer:
         """Get new audio that hasn't been transcribed yet (with overlap)"""
         with self.lock:
             if len(self.buffer) == 0:
-                return np.array([])
+                return np.array([], dtype=np.int16)
             
             # Calculate start position with overlap
             start_pos = max(0, self.last_transcribed_position - self.overlap_samples)
@@ -12,153 +12,388 @@ Licensed under the MIT License (see LICENSE file for details)
 """
 
 import os
+import io
+import logging
+import sys
+import time
+import threading
 import json
 import csv
+import atexit
+from contextlib import contextmanager
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import tkinter as tk
 from tkinter import filedialog, messagebox
-from . import config
+
+# Optional fast JSON encoder (C implementation), falls back to the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Debug output goes through logging; disabled debug calls cost a level check
+logger = logging.getLogger(__name__)
+
+
+# Backup journal settings
+BACKUP_FOLDER = "transcriptions_history"
+BACKUP_BUFFER_SIZE = 64 * 1024
+FIRST_AUTOSAVE_AT = 10  # Checkpoints then back off: 10, 20, 30, 45, 67, 100, ...
+
+# Exports are written through a large buffer so rows coalesce into few syscalls
+EXPORT_BUFFER_SIZE = 1 << 20
+
+# TXT export layout, formatted once per entry with a single % operation
+TXT_EXPORT_HEADER = "Transcription Export - %s\n" + "=" * 60 + "\n\n"
+TXT_EXPORT_SEPARATOR = "-" * 40 + "\n\n"
+TXT_EXPORT_ENTRY = ("Entry %d - %s\n"
+                    "Language: %s → %s\n"
+                    "Original: %s\n"
+                    "Translation: %s\n" + TXT_EXPORT_SEPARATOR)
+
+
+@contextmanager
+def _open_export(filename, newline=None, binary=False):
+    """Open an export file through a 1 MB buffered writer.
+    
+    Data goes to a temporary file that atomically replaces the target once
+    writing succeeds, so a failed export never leaves a truncated file.
+    """
+    tmp_filename = filename + ".tmp"
+    raw = open(tmp_filename, 'wb', buffering=0)
+    f = io.BufferedWriter(raw, buffer_size=EXPORT_BUFFER_SIZE)
+    if not binary:
+        # No write-through: text (and csv rows) batch in the 1 MB buffer and
+        # reach the OS in a single flush when the file is closed
+        f = io.TextIOWrapper(f, encoding='utf-8', newline=newline, write_through=False)
+    try:
+        with f:
+            yield f
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_filename)
+        except OSError:
+            pass
+        raise
+
+
+def _encode_json(obj, indent=False):
+    """Encode an object as UTF-8 JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
+
+
+# Last formatted (second, prefix) pair, swapped as one tuple so the I/O worker
+# and the UI thread can share it safely
+_last_timestamp_prefix = (None, '')
+
+
+def _format_timestamp(timestamp_ns):
+    """Format a time.time_ns() value as a local ISO-8601 timestamp with microseconds"""
+    global _last_timestamp_prefix
+    second, nanos = divmod(timestamp_ns, 1_000_000_000)
+    cached_second, prefix = _last_timestamp_prefix
+    if second != cached_second:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(second))
+        _last_timestamp_prefix = (second, prefix)
+    return f"{prefix}.{nanos // 1000:06d}"
+
+
+class EntriesView:
+    """Read-only sequence of entry dicts built on demand from the history columns"""
+    
+    def __init__(self, history):
+        self._history = history
+    
+    def __len__(self):
+        return len(self._history.timestamps)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        history = self._history
+        return {
+            'timestamp': _format_timestamp(history.timestamps[index]),
+            'original_text': history.originals[index],
+            'translated_text': history.translateds[index],
+            'source_language': history.source_langs[index],
+            'target_language': history.target_langs[index]
+        }
+    
+    def __iter__(self):
+        history = self._history
+        for ts, original, translated, source_lang, target_lang in zip(
+                history.timestamps, history.originals, history.translateds,
+                history.source_langs, history.target_langs):
+            yield {
+                'timestamp': _format_timestamp(ts),
+                'original_text': original,
+                'translated_text': translated,
+                'source_language': source_lang,
+                'target_language': target_lang
+            }
 
 
 class TranscriptionHistory:
     """Manages transcription history and export functionality"""
     
     def __init__(self):
-        self.entries = []
+        # Entries are stored column-wise (one list per field) instead of one dict each;
+        # timestamps are time.time_ns() integers, formatted only when read or saved.
+        # Columns stay plain lists: appends are amortized O(1) and, unlike deques,
+        # lists can be iterated by the export worker while new entries arrive.
+        self.timestamps = []
+        self.originals = []
+        self.translateds = []
+        self.source_langs = []
+        self.target_langs = []
+        self.word_counts = []  # Words in original + translated text, for the history stats
+        self.total_words = 0
+        self.entries = EntriesView(self)
+        self._start_session()
+        self._backup_fp = None  # Append-only JSON-Lines journal, opened lazily
+        self._backup_dir_ready = False
+        self._next_autosave_at = FIRST_AUTOSAVE_AT
+        # add_entry runs on the transcription thread and clear_history on the Tk
+        # thread; the lock keeps the columns from tearing between the two
+        self._lock = threading.Lock()
+        
+        # Backup writes run on a single background worker (keeps them ordered)
+        # so add_entry never blocks the transcription path on disk I/O
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-io")
+        atexit.register(self._shutdown_io)
+        
+    def __len__(self):
+        return len(self.timestamps)
+    
+    def _start_session(self):
+        """Start a new session and reset the export envelope template"""
         self.current_session_start = datetime.now()
+        self._last_entry_key = None
+        # Only export_date and total_entries change between exports
+        self._export_template = {
+            'export_date': None,
+            'session_start': self.current_session_start.isoformat(),
+            'total_entries': 0
+        }
         
     def add_entry(self, original_text, translated_text, source_lang, target_lang):
         """Add a new transcription entry"""
-        entry = {
-            'timestamp': datetime.now().isoformat(),
-            'original_text': original_text,
-            'translated_text': translated_text,
-            'source_language': source_lang,
-            'target_language': target_lang
-        }
-        self.entries.append(entry)
-        
-        # Auto-save every 10 entries
-        if len(self.entries) % 10 == 0:
-            self.auto_save()
-    
-    def auto_save(self):
-        """Auto-save to a backup file (silent)"""
-        try:
-            # Create transcriptions_history folder if it doesn't exist
-            backup_folder = "transcriptions_history"
-            if not os.path.exists(backup_folder):
-                os.makedirs(backup_folder)
+        with self._lock:
+            # Skip an exact repeat of the previous entry (ASR often re-emits a phrase)
+            entry_key = (original_text, translated_text, source_lang, target_lang)
+            if entry_key == self._last_entry_key:
+                return
+            self._last_entry_key = entry_key
             
-            backup_filename = f"transcription_backup_{self.current_session_start.strftime('%Y%m%d_%H%M%S')}.json"
-            backup_file = os.path.join(backup_folder, backup_filename)
+            # Language codes repeat across the whole session, share one object each
+            source_lang = sys.intern(source_lang)
+            target_lang = sys.intern(target_lang)
             
-            # Silent save without dialog
-            export_data = {
-                'export_date': datetime.now().isoformat(),
-                'session_start': self.current_session_start.isoformat(),
-                'total_entries': len(self.entries),
-                'transcriptions': self.entries
-            }
+            timestamp_ns = time.time_ns()
+            word_count = len(original_text.split()) + len(translated_text.split())
+            self.originals.append(original_text)
+            self.translateds.append(translated_text)
+            self.source_langs.append(source_lang)
+            self.target_langs.append(target_lang)
+            self.word_counts.append(word_count)
+            self.total_words += word_count
+            
+            # Formatting and encoding happen on the I/O worker, off the caller's path
+            self._io_pool.submit(self._append_to_backup, {
+                'timestamp': timestamp_ns,
+                'original_text': original_text,
+                'translated_text': translated_text,
+                'source_language': source_lang,
+                'target_language': target_lang
+            })
+            # Appended last: len() only counts complete entries, so the history
+            # window can read every column up to it from the UI thread
+            self.timestamps.append(timestamp_ns)
             
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+            # Flush the backup journal on an exponentially backed-off cadence
+            if len(self) >= self._next_autosave_at:
+                self._io_pool.submit(self.auto_save)
+                self._next_autosave_at = max(self._next_autosave_at + 10, int(self._next_autosave_at * 1.5))
+    
+    def _append_to_backup(self, entry):
+        """Encode an entry and append it to the session's JSON-Lines backup (silent)"""
+        # The journal is machine-read, so entries are written compact, one per line
+        entry['timestamp'] = _format_timestamp(entry['timestamp'])
+        entry_json = _encode_json(entry)
+        try:
+            if self._backup_fp is None:
+                # Create transcriptions_history folder once per process
+                if not self._backup_dir_ready:
+                    os.makedirs(BACKUP_FOLDER, exist_ok=True)
+                    self._backup_dir_ready = True
                 
-            if config.ENABLE_DEBUG_LOGGING:
-                print(f"Auto-saved {len(self.entries)} entries to {backup_file}")
+                backup_filename = f"transcription_backup_{self.current_session_start.strftime('%Y%m%d_%H%M%S')}.jsonl"
+                self._backup_fp = open(os.path.join(BACKUP_FOLDER, backup_filename), 'ab',
+                                       buffering=BACKUP_BUFFER_SIZE)
+            
+            self._backup_fp.write(entry_json + b"\n")
+        except Exception as e:
+            logger.debug("Backup journal write error: %s", e)
+    
+    def auto_save(self):
+        """Flush the backup journal to disk (silent)"""
+        if self._backup_fp is None:
+            return
+        try:
+            self._backup_fp.flush()
+            
+            logger.debug("Auto-saved %d entries to %s", len(self), self._backup_fp.name)
+        except Exception as e:
+            logger.debug("Backup journal flush error: %s", e)
+    
+    def close_backup(self):
+        """Flush and close the current backup journal once pending writes are done"""
+        try:
+            self._io_pool.submit(self._close_backup).result()
+        except RuntimeError:
+            # I/O worker already shut down at exit
+            self._close_backup()
+    
+    def _shutdown_io(self):
+        """Close the backup journal and stop the I/O worker (runs at exit)"""
+        self.close_backup()
+        self._io_pool.shutdown(wait=True)
+    
+    def _close_backup(self):
+        """Flush and close the current backup journal"""
+        if self._backup_fp is None:
+            return
+        try:
+            self._backup_fp.close()
         except Exception as e:
-            if config.ENABLE_DEBUG_LOGGING:
-                print(f"Auto-save error: {e}")
+            logger.debug("Backup journal close error: %s", e)
+        finally:
+            self._backup_fp = None
     
-    def export_txt(self, filename=None):
+    def export_txt(self, filename=None, parent=None):
         """Export transcriptions as plain text"""
-        if not filename:
-            filename = filedialog.asksaveasfilename(
-                title="Export as Text",
-                defaultextension=".txt",
-                filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
-            )
-        
-        if filename:
-            try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(f"Transcription Export - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write("=" * 60 + "\n\n")
-                    
-                    for i, entry in enumerate(self.entries, 1):
-                        f.write(f"Entry {i} - {entry['timestamp']}\n")
-                        f.write(f"Language: {entry['source_language']} → {entry['target_language']}\n")
-                        f.write(f"Original: {entry['original_text']}\n")
-                        f.write(f"Translation: {entry['translated_text']}\n")
-                        f.write("-" * 40 + "\n\n")
-                
-                messagebox.showinfo("Export Complete", f"Exported {len(self.entries)} entries to {filename}")
-                return True
-            except Exception as e:
-                messagebox.showerror("Export Error", f"Failed to export: {e}")
-                return False
+        return self._export(filename, self._write_txt, parent,
+                            title="Export as Text",
+                            defaultextension=".txt",
+                            filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
     
-    def export_json(self, filename=None):
+    def export_json(self, filename=None, parent=None):
         """Export transcriptions as JSON"""
-        if not filename:
-            filename = filedialog.asksaveasfilename(
-                title="Export as JSON",
-                defaultextension=".json",
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
-            )
-        
-        if filename:
-            try:
-                export_data = {
-                    'export_date': datetime.now().isoformat(),
-                    'session_start': self.current_session_start.isoformat(),
-                    'total_entries': len(self.entries),
-                    'transcriptions': self.entries
-                }
-                
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, indent=2, ensure_ascii=False)
-                
-                # Only show dialog for manual exports, not auto-save
-                if filename.startswith('transcription_backup_'):
-                    return True
-                else:
-                    messagebox.showinfo("Export Complete", f"Exported {len(self.entries)} entries to {filename}")
-                    return True
-            except Exception as e:
-                messagebox.showerror("Export Error", f"Failed to export: {e}")
-                return False
-    
-    def export_csv(self, filename=None):
+        # Only show dialog for manual exports, not auto-save
+        return self._export(filename, self._write_json, parent,
+                            quiet_prefix='transcription_backup_',
+                            title="Export as JSON",
+                            defaultextension=".json",
+                            filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+    
+    def export_csv(self, filename=None, parent=None):
         """Export transcriptions as CSV"""
+        return self._export(filename, self._write_csv, parent,
+                            title="Export as CSV",
+                            defaultextension=".csv",
+                            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+    
+    def _export(self, filename, write, parent=None, quiet_prefix=None, **dialog_options):
+        """Pick the target path on the UI thread and write it on the I/O worker.
+        
+        With a parent widget the call returns immediately and the completion
+        dialog is posted back through parent.after(); without one it waits for
+        the write and returns whether it succeeded.
+        """
+        if not filename:
+            filename = filedialog.asksaveasfilename(**dialog_options)
         if not filename:
-            filename = filedialog.asksaveasfilename(
-                title="Export as CSV",
-                defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
-            )
+            return None
         
-        if filename:
-            try:
-                with open(filename, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(['Timestamp', 'Source Language', 'Target Language', 'Original Text', 'Translated Text'])
-                    
-                    for entry in self.entries:
-                        writer.writerow([
-                            entry['timestamp'],
-                            entry['source_language'],
-                            entry['target_language'],
-                            entry['original_text'],
-                            entry['translated_text']
-                        ])
-                
-                messagebox.showinfo("Export Complete", f"Exported {len(self.entries)} entries to {filename}")
-                return True
-            except Exception as e:
-                messagebox.showerror("Export Error", f"Failed to export: {e}")
-                return False
+        # Snapshot the entry count so rows added during the write are left out
+        count = len(self)
+        quiet = quiet_prefix is not None and filename.startswith(quiet_prefix)
+        future = self._io_pool.submit(write, filename, count)
+        
+        if parent is None:
+            return self._report_export(future, filename, count, quiet)
+        self._poll_export(parent, future, filename, count, quiet)
+        return True
+    
+    def _poll_export(self, parent, future, filename, count, quiet):
+        """Wait for a background export without blocking the Tk event loop"""
+        if future.done():
+            self._report_export(future, filename, count, quiet)
+            return
+        try:
+            parent.after(50, self._poll_export, parent, future, filename, count, quiet)
+        except tk.TclError:
+            pass  # Window was closed, nothing left to report to
+    
+    def _report_export(self, future, filename, count, quiet=False):
+        """Show the outcome of an export (waits for it to finish)"""
+        try:
+            future.result()
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Failed to export: {e}")
+            return False
+        if not quiet:
+            messagebox.showinfo("Export Complete", f"Exported {count} entries to {filename}")
+        return True
+    
+    def _write_txt(self, filename, count):
+        """Write the first count entries as plain text (runs on the I/O worker)"""
+        # Build every entry block first and write them in one call
+        header = TXT_EXPORT_HEADER % datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = islice(zip(map(_format_timestamp, self.timestamps), self.source_langs, self.target_langs,
+                          self.originals, self.translateds), count)
+        parts = [TXT_EXPORT_ENTRY % ((i,) + row) for i, row in enumerate(rows, 1)]
+        
+        with _open_export(filename) as f:
+            f.write(header)
+            f.write("".join(parts))
+    
+    def _write_json(self, filename, count):
+        """Write the first count entries as JSON (runs on the I/O worker)"""
+        export_data = self._export_template
+        export_data['export_date'] = datetime.now().isoformat()
+        export_data['total_entries'] = count
+        
+        # Same layout as json.dump(indent=2): each entry is encoded indented and
+        # shifted under "transcriptions", then streamed through the buffered
+        # writer, so the whole document is never held in memory at once
+        header = _encode_json(export_data, indent=True)[:-len(b"\n}")]
+        with _open_export(filename, binary=True) as f:
+            f.write(header + b',\n  "transcriptions": [')
+            separator = b"\n    "
+            for entry in islice(self.entries, count):
+                f.write(separator)
+                f.write(_encode_json(entry, indent=True).replace(b"\n", b"\n    "))
+                separator = b",\n    "
+            f.write(b"\n  ]\n}" if count else b"]\n}")
+    
+    def _write_csv(self, filename, count):
+        """Write the first count entries as CSV (runs on the I/O worker)"""
+        with _open_export(filename, newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Timestamp', 'Source Language', 'Target Language', 'Original Text', 'Translated Text'])
+            
+            # zip already yields one row tuple per entry, straight from the columns
+            writer.writerows(islice(zip(map(_format_timestamp, self.timestamps), self.source_langs,
+                                        self.target_langs, self.originals, self.translateds), count))
     
     def clear_history(self):
         """Clear all transcription history"""
-        self.entries.clear()
-        self.current_session_start = datetime.now() 
\ No newline at end of file
+        with self._lock:
+            # A new session starts a new backup journal
+            self.close_backup()
+            # Fresh lists instead of clearing in place, swapped while add_entry is locked out
+            self.timestamps = []
+            self.originals = []
+            self.translateds = []
+            self.source_langs = []
+            self.target_langs = []
+            self.word_counts = []
+            self.total_words = 0
+            self._start_session()
+            self._next_autosave_at = FIRST_AUTOSAVE_AT 
\ No newline at end of file
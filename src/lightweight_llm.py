@@ -12,9 +12,207 @@ Licensed under the MIT License (see LICENSE file for details)
 """
 
 import re
+import math
+import functools
+import operator
 import numpy as np
 from collections import Counter, deque
 
+# Optional prefix similarity in C (rapidfuzz), falls back to the Python loop
+try:
+    from rapidfuzz.distance import Prefix
+except ImportError:
+    Prefix = None
+
+
+# Bytes que no son letras a-z (se eliminan antes de contar)
+_ALPHA_BYTES = bytes(range(ord('a'), ord('z') + 1))
+_NON_ALPHA_BYTES = bytes(b for b in range(256) if b not in _ALPHA_BYTES)
+
+
+@functools.lru_cache(maxsize=4096)
+def _letter_histogram(word):
+    """Return (a-z counts, alphabetic length, a-z letter set) for a word"""
+    word_lower = word.lower()
+    letters = word_lower.encode('ascii', 'ignore').translate(None, _NON_ALPHA_BYTES)
+    counts = tuple(map(letters.count, _ALPHA_BYTES))
+    # La normalización usa todas las letras (también acentuadas), como antes
+    return counts, sum(map(str.isalpha, word_lower)), frozenset(letters)
+
+
+def _words_to_counts(words):
+    """Return the a-z counts of words as a (N, 26) uint8 matrix plus their float32 lengths"""
+    # Un solo bincount sobre los bytes de todas las palabras: fila = nº de espacios previos
+    joined = ' '.join(words).lower()
+    codes = np.frombuffer(joined.encode('ascii', 'ignore'), dtype=np.uint8)
+    rows = np.cumsum(codes == 32)
+    letters = (codes >= 97) & (codes <= 122)
+    counts = np.bincount(
+        rows[letters] * 26 + (codes[letters] - 97), minlength=len(words) * 26
+    ).reshape(len(words), 26)
+    
+    if joined.isascii():
+        lengths = counts.sum(axis=1)
+    else:
+        # Las letras acentuadas también cuentan en la longitud, como en _letter_histogram
+        lengths = np.array([_letter_histogram(word)[1] for word in words])
+    
+    # uint8 basta para contar letras de una palabra; la normalización se hace al medir distancias
+    return np.minimum(counts, 255).astype(np.uint8), np.maximum(lengths, 1).astype(np.float32)
+
+
+def _exact_overlap_lengths(tail, head):
+    """Return every k such that tail[-k:] == head[:k] (KMP failure function)"""
+    sequence = head + [None] + tail  # None separa: ninguna palabra es igual a él
+    failure = [0] * len(sequence)
+    for i in range(1, len(sequence)):
+        k = failure[i - 1]
+        while k and sequence[i] != sequence[k]:
+            k = failure[k - 1]
+        if sequence[i] == sequence[k]:
+            k += 1
+        failure[i] = k
+    
+    # La cadena de fallos desde el final recorre todos los bordes, de mayor a menor
+    lengths = set()
+    k = failure[-1]
+    while k:
+        lengths.add(k)
+        k = failure[k - 1]
+    return lengths
+
+
+# ✅ FRASES Y PATRONES PRECOMPILADOS (antes se reconstruían en cada llamada)
+_GOODBYE_PHRASES = (
+    'thank you', 'thanks', 'goodbye', 'bye', 'see you later',
+    'thanks for watching', 'thanks for listening', "that's it", "that's all"
+)
+
+_ENDING_PHRASES = (
+    'thank you', 'thanks', 'goodbye', 'bye', 'see you', 'talk to you later',
+    "that's it", "that's all", 'the end', "that's everything",
+    'in conclusion', 'to summarize', 'to conclude', 'finally',
+    'alright', 'okay', 'good', 'perfect', 'excellent', 'great'
+)
+
+_EXPLICIT_ENDINGS = (
+    'thank you', 'thanks', 'goodbye', 'bye', 'see you later', 'talk to you later',
+    "that's it", "that's all", 'the end', "that's everything",
+    'in conclusion', 'to summarize', 'to conclude', 'finally',
+    'alright then', 'okay then', 'good job', 'perfect', 'excellent work',
+    'thanks for watching', 'thanks for listening'
+)
+
+_EXCLAMATION_STARTERS = ('wow', 'amazing', 'incredible', 'fantastic', 'great', 'excellent', 'perfect')
+
+
+# Categorías de frase (bits): una sola pasada detecta las tres listas
+PHRASE_GOODBYE = 1
+PHRASE_ENDING = 2
+PHRASE_EXPLICIT = 4
+
+_PHRASE_CATEGORIES = {}
+for _phrases, _category in ((_GOODBYE_PHRASES, PHRASE_GOODBYE),
+                            (_ENDING_PHRASES, PHRASE_ENDING),
+                            (_EXPLICIT_ENDINGS, PHRASE_EXPLICIT)):
+    for _phrase in _phrases:
+        _PHRASE_CATEGORIES[_phrase] = _PHRASE_CATEGORIES.get(_phrase, 0) | _category
+del _phrases, _category, _phrase
+
+# Una frase también hereda las categorías de las frases que contiene ('goodbye' ⊃ 'bye')
+_PHRASE_MASKS = {
+    phrase: functools.reduce(
+        operator.or_, (mask for other, mask in _PHRASE_CATEGORIES.items() if other in phrase)
+    )
+    for phrase in _PHRASE_CATEGORIES
+}
+
+def _phrase_trie_regex(phrases):
+    """Render phrases as a prefix-factored regex (a character trie) that matches the longest phrase"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}  # Fin de frase
+    
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Una frase que termina aquí puede seguir creciendo (greedy: la más larga primero)
+        return '(?:' + body + ')?' if '' in node else body
+    
+    return render(trie)
+
+
+# Zero-width lookahead so overlapping phrases are all reported; the trie layout means
+# each text position follows a single branch instead of trying every phrase in turn
+_PHRASE_PATTERN = re.compile('(?=(' + _phrase_trie_regex(_PHRASE_MASKS) + '))')
+
+
+def _find_phrase(text_lower, category):
+    """Return the first phrase of a PHRASE_* category found in text_lower, or None"""
+    for match in _PHRASE_PATTERN.finditer(text_lower):
+        phrase = match.group(1)
+        if _PHRASE_MASKS[phrase] & category:
+            return phrase
+    return None
+
+
+# Pattern: Complete subject-verb-object structures
+_COMPLETE_SENTENCE_PATTERNS = (
+    # Declarative statements that are clearly complete
+    r'\b(this|that|it|he|she|they|we|you|i)\s+(is|are|was|were|will be|has been|have been)\b.*\.',
+    r'\b(the|a|an)\s+\w+\s+(is|are|was|were|will be|has been|have been)\b.*\.',
+    
+    # Action statements that are clearly complete
+    r'\b(he|she|they|we|you|i)\s+(do|does|did|will|can|could|should|would)\b.*\.',
+    r'\b(he|she|they|we|you|i)\s+(have|has|had|will have)\b.*\.',
+    
+    # Statements with clear objects/completions
+    r'\b.*\s+(designed|created|built|made|developed|launched|released)\s+.*\.',
+    r'\b.*\s+(costs|priced|worth|valued|available)\s+.*\.',
+    r'\b.*\s+(announced|revealed|showed|demonstrated|presented)\s+.*\.',
+    
+    # Complete informational statements
+    r'\b(google|apple|microsoft|amazon|meta|tesla|nvidia|intel|amd)\s+.*\.',
+    r'\b.*\s+(company|corporation|organization|startup|business)\s+.*\.',
+    r'\b.*\s+(product|service|application|software|hardware|device)\s+.*\.',
+    
+    # Statements with clear temporal completions
+    r'\b.*(today|yesterday|tomorrow|now|currently|recently|finally)\s*\.',
+    r'\b.*(launched|released|announced|unveiled|introduced)\s+(today|yesterday|this week|this month|this year)\s*\.'
+)
+
+# Tabla para borrar . ! ? de una pasada (contarlos = diferencia de longitudes)
+_SENTENCE_PUNCT_DELETE = str.maketrans('', '', '.!?')
+
+# Puntuación de final de oración (y el espacio que la sigue)
+_SENTENCE_END_RE = re.compile(r'([.!?。！？])\s*')
+
+# Patrones de fragmentos MÁS ESPECÍFICOS - solo los más obvios
+_INCOMPLETE_ENDING_PATTERNS = (
+    # Solo los finales más obviamente incompletos
+    r'\b(the|a|an|and|or|but|so|for|to|of|in|on|at|with|by|from)$',
+    r'\b(is|are|was|were|has|have|had|will|would|could|should|can|may|might)$',
+    
+    # Conectores que claramente indican continuación
+    r'\b(because|since|although|while|whereas|unless|until|before|after)$',
+    r'\b(which|that|who|where|when|how|why|what)$',
+)
+
+
+def _compile_any(patterns):
+    """Compile patterns into one alternation that matches wherever any of them would"""
+    return re.compile('|'.join('(?:%s)' % pattern for pattern in patterns))
+
+
+# Una sola búsqueda por texto en vez de una por patrón
+_COMPLETE_SENTENCE_RE = _compile_any(_COMPLETE_SENTENCE_PATTERNS)
+_INCOMPLETE_ENDING_RE = _compile_any(_INCOMPLETE_ENDING_PATTERNS)
+
 
 class LightweightLLM:
     """Sistema de concatenación simple basado en distancia de Mahalanobis palabra por palabra"""
@@ -25,8 +223,12 @@ class LightweightLLM:
         self.tokenizer = None
         # ✅ SIMPLIFIED APPROACH - Word-by-word Mahalanobis distance
         self.min_text_length = 3
-        self.word_history = []  # Store recent words for Mahalanobis calculation
         self.max_history = 50   # Keep last 50 words
+        self.word_history = deque(maxlen=self.max_history)  # Store recent words for Mahalanobis calculation
+        # Resultados memorizados por texto: el mismo sufijo se revalida al llegar cada fragmento
+        self.check_cache_size = 256
+        self._ending_cache = {}
+        self._fragment_cache = {}
         print("🧠 Initializing Mahalanobis word-distance system...")
         print("✅ Word-distance system ready")
     
@@ -48,8 +250,9 @@ class LightweightLLM:
         should_complete = self._has_punctuation_in_middle(cleaned_text)
         
         # ✅ 3. SAFETY VALVE: Textos muy largos - MÁS PERMISIVO
-        if len(cleaned_text.split()) > 80:  # Incrementado de 50 a 80
-            print(f"⚠️ Forzando completado por texto muy largo ({len(cleaned_text.split())} palabras)")
+        word_count = len(cleaned_text.split())
+        if word_count > 80:  # Incrementado de 50 a 80
+            print(f"⚠️ Forzando completado por texto muy largo ({word_count} palabras)")
             return cleaned_text, True, "Mahalanobis + complete"
         
         return cleaned_text, should_complete, f"Mahalanobis + {'complete' if should_complete else 'continue'}"
@@ -69,15 +272,31 @@ class LightweightLLM:
         # Comprobar hasta 6 palabras de solapamiento máximo
         max_check = min(6, len(acc_words), len(new_words))
         
-        for overlap_size in range(1, max_check + 1):
-            acc_end = acc_words[-overlap_size:]  # Últimas palabras de accumulated
-            new_start = new_words[:overlap_size]  # Primeras palabras de new
+        # Solapamientos exactos (sin mayúsculas) en una sola pasada KMP
+        acc_tail = [w.lower() for w in acc_words[-max_check:]]
+        new_head = [w.lower() for w in new_words[:max_check]]
+        exact_lengths = _exact_overlap_lengths(acc_tail, new_head)
+        
+        # Un solapamiento de k palabras empareja siempre la última palabra acumulada con new_head[k-1]:
+        # si esa pareja ya no coincide, el tamaño k se descarta sin mirar el resto (caso habitual)
+        last_word = acc_tail[-1]
+        candidate_sizes = [
+            overlap_size for overlap_size in range(max_check, 0, -1)
+            if overlap_size in exact_lengths
+            or self._calculate_word_mahalanobis_distance(last_word, new_head[overlap_size - 1], limit=0.15) <= 0.15
+        ]
+        
+        # De mayor a menor: el primer solapamiento válido es el más largo
+        for overlap_size in candidate_sizes:
+            acc_end = acc_tail[-overlap_size:]  # Últimas palabras de accumulated
+            new_start = new_head[:overlap_size]  # Primeras palabras de new
             
-            # Comprobar si son iguales (o muy similares con Mahalanobis)
-            if self._words_match_with_mahalanobis(acc_end, new_start):
+            # Iguales, o muy similares con Mahalanobis (la última pareja ya está comprobada)
+            if overlap_size in exact_lengths or self._words_match_with_mahalanobis(acc_end[:-1], new_start[:-1]):
                 best_overlap_size = overlap_size
                 best_overlap_pos = overlap_size
-                print(f"🔗 Solapamiento detectado: {overlap_size} palabras: {' '.join(acc_end)}")
+                print(f"🔗 Solapamiento detectado: {overlap_size} palabras: {' '.join(acc_words[-overlap_size:])}")
+                break
         
         # ✅ MERGE CON LA PALABRA MÁS LARGA
         if best_overlap_size > 0:
@@ -112,12 +331,12 @@ class LightweightLLM:
             return accumulated_text + " " + new_text
     
     def _words_match_with_mahalanobis(self, words1, words2):
-        """Comprueba si dos listas de palabras coinciden usando distancia de Mahalanobis"""
+        """Comprueba si dos listas de palabras (ya en minúsculas) coinciden usando distancia de Mahalanobis"""
         if len(words1) != len(words2):
             return False
         
         for w1, w2 in zip(words1, words2):
-            distance = self._calculate_word_mahalanobis_distance(w1.lower(), w2.lower())
+            distance = self._calculate_word_mahalanobis_distance(w1, w2, limit=0.15)
             # Umbral más permisivo para detectar palabras similares
             if distance > 0.15:  # Si la distancia es mayor, no coinciden
                 return False
@@ -139,7 +358,7 @@ class LightweightLLM:
         
         # ✅ SOLO COMPLETAR SI HAY MÚLTIPLES ORACIONES CLARAS
         # Contar cuántas oraciones completas hay
-        sentence_endings = text_without_end_punct.count('.') + text_without_end_punct.count('!') + text_without_end_punct.count('?')
+        sentence_endings = len(text_without_end_punct) - len(text_without_end_punct.translate(_SENTENCE_PUNCT_DELETE))
         
         # Solo completar si hay al menos 2 oraciones claramente separadas
         if sentence_endings >= 2:
@@ -147,16 +366,10 @@ class LightweightLLM:
             return True
         
         # ✅ FRASES DE DESPEDIDA EXPLÍCITAS (siempre completar)
-        goodbye_phrases = [
-            'thank you', 'thanks', 'goodbye', 'bye', 'see you later',
-            'thanks for watching', 'thanks for listening', 'that\'s it', 'that\'s all'
-        ]
-        
-        text_lower = text.lower()
-        for phrase in goodbye_phrases:
-            if phrase in text_lower:
-                print(f"✅ Frase de despedida detectada: '{phrase}'")
-                return True
+        phrase = _find_phrase(text.lower(), PHRASE_GOODBYE)
+        if phrase:
+            print(f"✅ Frase de despedida detectada: '{phrase}'")
+            return True
         
         # ✅ MÁS CONSERVADOR: No completar en otros casos
         return False
@@ -170,25 +383,18 @@ class LightweightLLM:
         if len(words) < 10:
             return False
         
-        # ✅ MÉTODO 1: Detectar palabras consecutivas repetidas
-        consecutive_repeats = 0
-        max_consecutive = 0
-        for i in range(1, len(words)):
-            if words[i] == words[i-1]:
-                consecutive_repeats += 1
-                max_consecutive = max(max_consecutive, consecutive_repeats)
-            else:
-                consecutive_repeats = 0
+        # Textos largos (el caso del bucle de Whisper): comparaciones vectorizadas
+        if len(words) > 30:
+            max_consecutive, most_common_word, count = self._repetition_stats_vectorized(words)
+        else:
+            max_consecutive, most_common_word, count = self._repetition_stats(words)
         
+        # ✅ MÉTODO 1: Detectar palabras consecutivas repetidas
         if max_consecutive > 5:  # Más de 5 repeticiones consecutivas
             print(f"🚫 Bucle Whisper detectado: '{words[0]}' repetido {max_consecutive+1} veces")
             return True
         
         # ✅ MÉTODO 2: Detectar alta frecuencia de una sola palabra
-        from collections import Counter
-        word_counts = Counter(words)
-        most_common_word, count = word_counts.most_common(1)[0]
-        
         # Si una palabra aparece más del 70% del texto, es bucle
         if count > len(words) * 0.7 and len(words) > 15:
             print(f"🚫 Bucle Whisper detectado: '{most_common_word}' aparece {count}/{len(words)} veces")
@@ -196,6 +402,36 @@ class LightweightLLM:
         
         return False
     
+    def _repetition_stats(self, words):
+        """Return (longest consecutive repeat run, most common word, its count)"""
+        consecutive_repeats = 0
+        max_consecutive = 0
+        for i in range(1, len(words)):
+            if words[i] == words[i-1]:
+                consecutive_repeats += 1
+                max_consecutive = max(max_consecutive, consecutive_repeats)
+            else:
+                consecutive_repeats = 0
+        
+        word_counts = Counter(words)
+        most_common_word, count = word_counts.most_common(1)[0]
+        return max_consecutive, most_common_word, count
+    
+    def _repetition_stats_vectorized(self, words):
+        """Return (longest consecutive repeat run, most common word, its count) using NumPy"""
+        arr = np.array(words)
+        
+        # Longitud de la racha más larga de palabras iguales consecutivas
+        same_as_previous = np.concatenate(([0], (arr[1:] == arr[:-1]).view(np.int8), [0]))
+        edges = np.diff(same_as_previous)
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        max_consecutive = int((run_ends - run_starts).max()) if run_starts.size else 0
+        
+        values, counts = np.unique(arr, return_counts=True)
+        top = int(counts.argmax())
+        return max_consecutive, str(values[top]), int(counts[top])
+    
     def _is_semantic_continuation(self, accumulated_text, new_text):
         """Check if texts are semantically related and should be continued"""
         acc_words = set(accumulated_text.lower().split())
@@ -221,93 +457,71 @@ class LightweightLLM:
             
         return False
     
-    def _has_clear_sentence_ending(self, text):
+    def _has_clear_sentence_ending(self, text, words=None, text_lower=None):
         """Detect clear sentence endings that should force completion - VERY STRICT"""
         if not text:
             return False
+        return self._cached_check(self._ending_cache, self._check_clear_sentence_ending, text, words, text_lower)
+    
+    def _check_clear_sentence_ending(self, text, words, text_lower):
+        """Uncached body of _has_clear_sentence_ending, returns (result, debug message)"""
+        # Reutilizar split/lower precalculados por el llamador
+        if words is None:
+            words = text.split()
+        if text_lower is None:
+            text_lower = text.lower()
+        text_stripped = text.strip()
         
         # ✅ ONLY COMPLETE ON VERY OBVIOUS SENTENCE ENDINGS
         
         # 1. Explicit conversation endings (always complete these)
-        ending_phrases = [
-            'thank you', 'thanks', 'goodbye', 'bye', 'see you', 'talk to you later',
-            'that\'s it', 'that\'s all', 'the end', 'that\'s everything',
-            'in conclusion', 'to summarize', 'to conclude', 'finally',
-            'alright', 'okay', 'good', 'perfect', 'excellent', 'great'
-        ]
-        
-        text_lower = text.lower().strip()
-        for phrase in ending_phrases:
-            if phrase in text_lower:
-                print(f"✅ Clear ending phrase detected: '{phrase}'")
-                return True
+        phrase = _find_phrase(text_lower.strip(), PHRASE_ENDING)
+        if phrase:
+            return True, f"✅ Clear ending phrase detected: '{phrase}'"
             
         # 2. Question format (questions are usually complete)
-        if text.strip().endswith('?'):
-            words = text.split()
+        if text_stripped.endswith('?'):
             if len(words) >= 3:  # Minimum reasonable question length
-                print(f"✅ Complete question detected")
-                return True
+                return True, f"✅ Complete question detected"
             
         # 3. Exclamations (usually complete thoughts)
-        if text.strip().endswith('!'):
-            words = text.split()
+        if text_stripped.endswith('!'):
             if len(words) >= 3:  # Minimum reasonable exclamation length
-                print(f"✅ Complete exclamation detected")
-                return True
+                return True, f"✅ Complete exclamation detected"
             
         # 4. VERY SPECIFIC complete sentence patterns with periods
         # Only complete period-ending sentences if they match specific complete patterns
-        if text.strip().endswith('.'):
-            words = text.split()
-            
+        if text_stripped.endswith('.'):
             # Must be reasonably long to be considered complete
             if len(words) < 6:
-                return False
+                return False, None
             
-            # Pattern: Complete subject-verb-object structures
-            complete_sentence_patterns = [
-                # Declarative statements that are clearly complete
-                r'\b(this|that|it|he|she|they|we|you|i)\s+(is|are|was|were|will be|has been|have been)\b.*\.',
-                r'\b(the|a|an)\s+\w+\s+(is|are|was|were|will be|has been|have been)\b.*\.',
-                
-                # Action statements that are clearly complete
-                r'\b(he|she|they|we|you|i)\s+(do|does|did|will|can|could|should|would)\b.*\.',
-                r'\b(he|she|they|we|you|i)\s+(have|has|had|will have)\b.*\.',
-                
-                # Statements with clear objects/completions
-                r'\b.*\s+(designed|created|built|made|developed|launched|released)\s+.*\.',
-                r'\b.*\s+(costs|priced|worth|valued|available)\s+.*\.',
-                r'\b.*\s+(announced|revealed|showed|demonstrated|presented)\s+.*\.',
-                
-                # Complete informational statements
-                r'\b(google|apple|microsoft|amazon|meta|tesla|nvidia|intel|amd)\s+.*\.',
-                r'\b.*\s+(company|corporation|organization|startup|business)\s+.*\.',
-                r'\b.*\s+(product|service|application|software|hardware|device)\s+.*\.',
-                
-                # Statements with clear temporal completions
-                r'\b.*(today|yesterday|tomorrow|now|currently|recently|finally)\s*\.',
-                r'\b.*(launched|released|announced|unveiled|introduced)\s+(today|yesterday|this week|this month|this year)\s*\.'
-            ]
-            
-            text_lower = text.lower()
-            for pattern in complete_sentence_patterns:
-                if re.search(pattern, text_lower):
-                    print(f"✅ Complete sentence pattern detected")
-                    return True
+            if _COMPLETE_SENTENCE_RE.search(text_lower):
+                return True, f"✅ Complete sentence pattern detected"
             
             # If it doesn't match any complete patterns, it's likely a fragment
-            print(f"⏸️ Period detected but doesn't match complete sentence patterns - likely fragment")
-            return False
+            return False, f"⏸️ Period detected but doesn't match complete sentence patterns - likely fragment"
         
         # 5. Quotes (often complete thoughts)
-        if text.strip().endswith('"') or text.strip().endswith("'"):
-            words = text.split()
+        if text_stripped.endswith('"') or text_stripped.endswith("'"):
             if len(words) >= 4:
-                print(f"✅ Complete quoted statement detected")
-                return True
+                return True, f"✅ Complete quoted statement detected"
         
-        return False
+        return False, None
+    
+    def _cached_check(self, cache, check, text, *args):
+        """Run a (result, message) check once per text and replay its debug message on cache hits"""
+        entry = cache.get(text)
+        if entry is None:
+            entry = check(text, *args)
+            if len(cache) >= self.check_cache_size:
+                del cache[next(iter(cache))]  # FIFO: descartar la entrada más antigua
+            cache[text] = entry
+        
+        result, message = entry
+        if message:
+            print(message)
+        return result
     
     def _merge_natural_continuation(self, accumulated_text, new_text):
         """Merge texts that are natural continuations with smart overlap removal and truncated word handling"""
@@ -335,11 +549,12 @@ class LightweightLLM:
             max_overlap_check = min(4, len(accumulated_words), len(new_words))
             best_overlap = 0
             
+            # Minúsculas una sola vez para todos los tamaños de solapamiento
+            acc_tail = [w.lower() for w in accumulated_words[-max_overlap_check:]]
+            new_head = [w.lower() for w in new_words[:max_overlap_check]]
+            
             for overlap_size in range(max_overlap_check, 0, -1):
-                acc_ending = [w.lower() for w in accumulated_words[-overlap_size:]]
-                new_beginning = [w.lower() for w in new_words[:overlap_size]]
-                
-                if acc_ending == new_beginning:
+                if acc_tail[-overlap_size:] == new_head[:overlap_size]:
                     best_overlap = overlap_size
                     break
             
@@ -361,22 +576,25 @@ class LightweightLLM:
         if not word1 or not word2:
             return False
         
+        word1_lower = word1.lower()
+        word2_lower = word2.lower()
+        
         # ✅ METHOD 1: Check for hyphen indicating truncation
         if word1.endswith('-'):
-            truncated = word1[:-1].lower()  # Remove hyphen
-            complete = word2.lower()
+            truncated = word1_lower[:-1]  # Remove hyphen
+            complete = word2_lower
             if complete.startswith(truncated) and len(complete) > len(truncated):
                 return True
         
         if word2.endswith('-'):
-            truncated = word2[:-1].lower()  # Remove hyphen
-            complete = word1.lower()
+            truncated = word2_lower[:-1]  # Remove hyphen
+            complete = word1_lower
             if complete.startswith(truncated) and len(complete) > len(truncated):
                 return True
         
         # ✅ METHOD 2: Check for partial word completion (no hyphen)
-        word1_clean = word1.lower().strip('.,!?";:')
-        word2_clean = word2.lower().strip('.,!?";:')
+        word1_clean = word1_lower.strip('.,!?";:')
+        word2_clean = word2_lower.strip('.,!?";:')
         
         # If one word is contained at the start of another and is significantly shorter
         if len(word1_clean) >= 3 and len(word2_clean) >= 3:
@@ -402,6 +620,10 @@ class LightweightLLM:
         if not word1 or not word2:
             return 0.0
         
+        # Misma métrica: longitud del prefijo común / longitud máxima
+        if Prefix is not None:
+            return Prefix.normalized_similarity(word1, word2)
+        
         # Simple character-based similarity
         shorter = min(len(word1), len(word2))
         matching_chars = 0
@@ -419,9 +641,10 @@ class LightweightLLM:
         if not accumulated_text or not new_text:
             return new_text
         
-        acc_words = accumulated_text.lower().split()
-        new_words = new_text.lower().split()
+        # Solo se comparan las 10 últimas palabras: no hace falta pasar a minúsculas todo el texto
+        acc_words = [w.lower() for w in accumulated_text.rsplit(None, 10)[-10:]]
         original_new_words = new_text.split()
+        new_words = [w.lower() for w in original_new_words]
         
         if not acc_words or not new_words:
             return new_text
@@ -429,23 +652,24 @@ class LightweightLLM:
         cleaned_words = []
         duplicates_removed = 0
         
-        for i, (new_word, original_word) in enumerate(zip(new_words, original_new_words)):
-            # Check if this exact word appeared recently in accumulated text
-            is_duplicate = False
-            
-            # Check last few words for exact matches
-            check_range = min(10, len(acc_words))
-            for j in range(check_range):
-                acc_word = acc_words[-(j+1)]
-                distance = self._calculate_word_mahalanobis_distance(new_word, acc_word)
-                
-                if distance < 0.01:  # Exact match threshold
-                    print(f"🧮 Exact duplicate detected: '{new_word}' ≈ '{acc_word}' (dist: {distance:.3f})")
-                    is_duplicate = True
-                    duplicates_removed += 1
-                    break
-            
-            if not is_duplicate:
+        # Check last few words for exact matches (most recent first)
+        check_range = min(10, len(acc_words))
+        recent_words = acc_words[-check_range:][::-1]
+        
+        # ✅ BATCH: una sola matriz de distancias (nuevas × recientes) en vez de un cálculo por par
+        new_counts, new_lengths = _words_to_counts(new_words)
+        recent_counts, recent_lengths = _words_to_counts(recent_words)
+        new_matrix = new_counts / new_lengths[:, None]
+        recent_matrix = recent_counts / recent_lengths[:, None]
+        distances = np.sqrt(((new_matrix[:, None, :] - recent_matrix[None, :, :]) ** 2).sum(axis=2))
+        duplicate_mask = distances < 0.01  # Exact match threshold
+        
+        for new_word, original_word, row_mask, row in zip(new_words, original_new_words, duplicate_mask, distances):
+            if row_mask.any():
+                j = int(row_mask.argmax())
+                print(f"🧮 Exact duplicate detected: '{new_word}' ≈ '{recent_words[j]}' (dist: {row[j]:.3f})")
+                duplicates_removed += 1
+            else:
                 cleaned_words.append(original_word)
         
         if duplicates_removed > 0:
@@ -453,34 +677,31 @@ class LightweightLLM:
         
         return ' '.join(cleaned_words) if cleaned_words else new_text
     
-    def _calculate_word_mahalanobis_distance(self, word1, word2):
+    def _calculate_word_mahalanobis_distance(self, word1, word2, limit=None):
         """Calculate simple Mahalanobis-like distance between two words"""
-        # ✅ CHARACTER-BASED FEATURE VECTOR
-        # Create simple feature vectors based on character frequency
-        def word_to_vector(word):
-            # Simple feature: character frequency (a-z)
-            vector = np.zeros(26)
-            word_clean = ''.join(c.lower() for c in word if c.isalpha())
-            
-            for char in word_clean:
-                if 'a' <= char <= 'z':
-                    vector[ord(char) - ord('a')] += 1
-            
-            # Normalize by word length
-            if len(word_clean) > 0:
-                vector = vector / len(word_clean)
-                
-            return vector
+        if word1 == word2:
+            return 0.0
         
-        v1 = word_to_vector(word1)
-        v2 = word_to_vector(word2)
+        # ✅ CHARACTER-BASED FEATURE VECTOR
+        # Histogramas a-z cacheados por palabra, normalizados por longitud
+        counts1, len1, letters1 = _letter_histogram(word1)
+        counts2, len2, letters2 = _letter_histogram(word2)
+        len1 = len1 or 1
+        len2 = len2 or 1
+        
+        # ✅ EARLY BOUND: cada letra que sólo aparece en una palabra aporta al menos 1/len
+        # Si la cota ya supera el umbral del llamador, no hace falta la distancia completa
+        if limit is not None:
+            bound = math.sqrt(len(letters1 - letters2) / (len1 * len1) + len(letters2 - letters1) / (len2 * len2))
+            if bound > limit:
+                return bound
         
         # ✅ SIMPLIFIED MAHALANOBIS DISTANCE
         # Use identity covariance matrix for simplicity (equivalent to Euclidean)
-        diff = v1 - v2
-        distance = np.sqrt(np.sum(diff ** 2))
+        # Aritmética entera: |c1/len1 - c2/len2| = |c1*len2 - c2*len1| / (len1*len2)
+        squared = sum((a * len2 - b * len1) ** 2 for a, b in zip(counts1, counts2))
         
-        return distance
+        return math.sqrt(squared) / (len1 * len2)
     
     def _are_same_word_forms(self, word1, word2):
         """Check if two words are different forms of the same word"""
@@ -497,12 +718,8 @@ class LightweightLLM:
     
     def _update_word_history(self, text):
         """Update word history for future Mahalanobis calculations"""
-        words = text.lower().split()
-        self.word_history.extend(words)
-        
-        # Keep only recent words
-        if len(self.word_history) > self.max_history:
-            self.word_history = self.word_history[-self.max_history:]
+        # El deque acotado descarta solo las palabras más antiguas
+        self.word_history.extend(text.lower().split())
     
     def _has_very_explicit_ending(self, text):
         """Detect VERY explicit sentence endings - extremely strict"""
@@ -512,19 +729,11 @@ class LightweightLLM:
         # ✅ ONLY COMPLETE ON EXTREMELY OBVIOUS ENDINGS
         
         # 1. Explicit conversation endings (always complete these)
-        explicit_endings = [
-            'thank you', 'thanks', 'goodbye', 'bye', 'see you later', 'talk to you later',
-            "that's it", "that's all", 'the end', "that's everything",
-            'in conclusion', 'to summarize', 'to conclude', 'finally',
-            'alright then', 'okay then', 'good job', 'perfect', 'excellent work',
-            'thanks for watching', 'thanks for listening'
-        ]
-        
         text_lower = text.lower().strip()
-        for phrase in explicit_endings:
-            if phrase in text_lower:
-                print(f"✅ Clear ending phrase detected: '{phrase}'")
-                return True
+        phrase = _find_phrase(text_lower, PHRASE_EXPLICIT)
+        if phrase:
+            print(f"✅ Clear ending phrase detected: '{phrase}'")
+            return True
         
         # 2. Question endings with clear punctuation
         if text_lower.endswith('?') and len(text.split()) >= 4:
@@ -534,49 +743,40 @@ class LightweightLLM:
         # 3. Exclamation with clear context
         if text_lower.endswith('!') and len(text.split()) >= 4:
             # Check if it's a complete exclamation, not a fragment
-            exclamation_starters = ['wow', 'amazing', 'incredible', 'fantastic', 'great', 'excellent', 'perfect']
-            if any(text_lower.startswith(starter) for starter in exclamation_starters):
+            if text_lower.startswith(_EXCLAMATION_STARTERS):
                 print(f"✅ Clear exclamation detected")
                 return True
         
         # 4. NEVER complete on simple periods - they are almost always fragments
         return False
     
-    def _appears_to_be_fragment_aggressive(self, text):
+    def _appears_to_be_fragment_aggressive(self, text, words=None, text_lower=None):
         """MENOS AGRESIVO: Detectar fragmentos pero ser más permisivo"""
         if not text:
             return False
-        
-        words = text.lower().split()
+        return self._cached_check(self._fragment_cache, self._check_fragment, text, words, text_lower)
+    
+    def _check_fragment(self, text, words, text_lower):
+        """Uncached body of _appears_to_be_fragment_aggressive, returns (result, debug message)"""
+        if words is None:
+            words = text.split()
+        if text_lower is None:
+            text_lower = text.lower()
         if not words:
-            return False
+            return False, None
         
         # ✅ MENOS AGRESIVO: Solo fragmentos muy cortos son obviamente incompletos
         # 1. Textos muy cortos son fragmentos
         if len(words) < 5:  # Reducido de 8 a 5
-            print(f"🔗 Fragment detected: too short ({len(words)} words)")
-            return True
+            return True, f"🔗 Fragment detected: too short ({len(words)} words)"
         
         # 2. Solo fragmentos MUY obvios
-        text_clean = text.lower().strip('.,!?;: ')
+        text_clean = text_lower.strip('.,!?;: ')
         
-        # Patrones de fragmentos MÁS ESPECÍFICOS - solo los más obvios
-        obvious_incomplete_patterns = [
-            # Solo los finales más obviamente incompletos
-            r'\b(the|a|an|and|or|but|so|for|to|of|in|on|at|with|by|from)$',
-            r'\b(is|are|was|were|has|have|had|will|would|could|should|can|may|might)$',
-            
-            # Conectores que claramente indican continuación
-            r'\b(because|since|although|while|whereas|unless|until|before|after)$',
-            r'\b(which|that|who|where|when|how|why|what)$',
-        ]
-        
-        for pattern in obvious_incomplete_patterns:
-            if re.search(pattern, text_clean):
-                print(f"🔗 Fragment detected: ends with incomplete word")
-                return True
+        if _INCOMPLETE_ENDING_RE.search(text_clean):
+            return True, f"🔗 Fragment detected: ends with incomplete word"
         
-        return False
+        return False, None
     
     def correct_and_validate_text(self, text):
         """🧮 SIMPLIFIED: Basic text validation with improved fragment detection"""
@@ -591,12 +791,14 @@ class LightweightLLM:
             return False, text, "Too short"
         
         # ✅ 2. SIMPLE WORD DUPLICATE REMOVAL
-        corrected_text = self._remove_immediate_duplicates(text)
+        corrected_words = self._dedupe_words(words)
+        corrected_text = ' '.join(corrected_words)
+        corrected_lower = corrected_text.lower()
         
         # ✅ 3. CHECK FOR COMPLETION USING NEW LOGIC
         # Only complete if it has clear ending AND is not a fragment
-        has_clear_ending = self._has_clear_sentence_ending(corrected_text)
-        appears_to_be_fragment = self._appears_to_be_fragment_aggressive(corrected_text)
+        has_clear_ending = self._has_clear_sentence_ending(corrected_text, corrected_words, corrected_lower)
+        appears_to_be_fragment = self._appears_to_be_fragment_aggressive(corrected_text, corrected_words, corrected_lower)
         
         is_complete = has_clear_ending and not appears_to_be_fragment
         
@@ -613,17 +815,23 @@ class LightweightLLM:
     
     def _remove_immediate_duplicates(self, text):
         """Remove immediate word duplicates (word word -> word)"""
-        words = text.split()
+        return ' '.join(self._dedupe_words(text.split()))
+    
+    def _dedupe_words(self, words):
+        """Drop words that repeat the immediately preceding word (case-insensitive)"""
         cleaned_words = []
+        previous_lower = None
         
-        for i, word in enumerate(words):
+        for word in words:
+            word_lower = word.lower()
             # Only remove if the exact same word appears immediately before
-            if i > 0 and word.lower() == words[i-1].lower():
+            if word_lower == previous_lower:
                 print(f"🧹 Removing immediate duplicate: '{word}'")
                 continue
+            previous_lower = word_lower
             cleaned_words.append(word)
         
-        return ' '.join(cleaned_words)
+        return cleaned_words
     
     # ✅ COMPATIBILITY METHODS
     def validate_text_coherence(self, text):
@@ -642,28 +850,17 @@ class LightweightLLM:
             return [], ""
         
         sentences = []
-        remaining = text
-        
-        # ✅ SPLIT BY SENTENCE PUNCTUATION
-        parts = re.split(r'([.!?。！？])\s*', text)
-        
-        current_sentence = ""
-        i = 0
-        while i < len(parts):
-            part = parts[i]
-            
-            if re.match(r'[.!?。！？]', part):
-                current_sentence += part
-                if current_sentence.strip():
-                    is_valid, corrected_sentence, reason = self.correct_and_validate_text(current_sentence.strip())
-                    if is_valid and corrected_sentence:
-                        sentences.append(corrected_sentence)
-                        print(f"✅ Extracted Sentence: '{corrected_sentence}' ({reason})")
-                current_sentence = ""
-            else:
-                current_sentence += part
-            
-            i += 1
         
-        remaining = current_sentence.strip()
-        return sentences, remaining 
\ No newline at end of file
+        # ✅ SPLIT BY SENTENCE PUNCTUATION (sin lista intermedia ni concatenaciones)
+        start = 0
+        for match in _SENTENCE_END_RE.finditer(text):
+            current_sentence = text[start:match.end(1)].strip()
+            start = match.end()
+            if current_sentence:
+                is_valid, corrected_sentence, reason = self.correct_and_validate_text(current_sentence)
+                if is_valid and corrected_sentence:
+                    sentences.append(corrected_sentence)
+                    print(f"✅ Extracted Sentence: '{corrected_sentence}' ({reason})")
+        
+        remaining = text[start:].strip()
+        return sentences, remaining 
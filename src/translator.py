@@ -11,17 +11,467 @@ Copyright (c) 2025 Kiko Cisneros
 Licensed under the MIT License (see LICENSE file for details)
 """
 
+import sys
 import time
 import re
-from collections import deque
+import functools
+import itertools
+import logging
+import types
+from collections import deque, OrderedDict
 from mlx_lm import load, generate
 import mlx.core as mx
 from . import config
 
+# Generación por lotes (versiones recientes de mlx_lm); sin ella translate_batch traduce uno a uno
+try:
+    from mlx_lm import batch_generate
+except ImportError:
+    batch_generate = None
+
+# Caché KV reutilizable para el prefijo de instrucciones (solo en versiones de mlx_lm que la exponen)
+try:
+    from mlx_lm.models.cache import make_prompt_cache, can_trim_prompt_cache, trim_prompt_cache
+except ImportError:
+    make_prompt_cache = None
+
+# Diagnóstico de carga del modelo, prompts y respuestas en bruto (config.ENABLE_DEBUG_LOGGING)
+logger = logging.getLogger(__name__)
+
+
+# Comprehensive language code mapping (read-only, shared by every translator)
+_LANGUAGE_NAMES = types.MappingProxyType({
+    # Major languages
+    "es": "Spanish", "en": "English", "fr": "French", "de": "German", 
+    "it": "Italian", "pt": "Portuguese", "ru": "Russian", "zh": "Chinese",
+    "ja": "Japanese", "ko": "Korean", "ar": "Arabic", "hi": "Hindi",
+
+    # European languages
+    "nl": "Dutch", "sv": "Swedish", "da": "Danish", "no": "Norwegian",
+    "fi": "Finnish", "pl": "Polish", "cs": "Czech", "hu": "Hungarian",
+    "ro": "Romanian", "bg": "Bulgarian", "hr": "Croatian", "sk": "Slovak",
+    "sl": "Slovenian", "et": "Estonian", "lv": "Latvian", "lt": "Lithuanian",
+    "mt": "Maltese", "cy": "Welsh", "ga": "Irish", "is": "Icelandic",
+
+    # Regional Spanish/European languages
+    "ca": "Catalan", "eu": "Basque", "gl": "Galician",
+
+    # Slavic languages
+    "mk": "Macedonian", "sq": "Albanian", "sr": "Serbian", 
+    "uk": "Ukrainian", "be": "Belarusian",
+
+    # Central Asian languages
+    "kk": "Kazakh", "ky": "Kyrgyz", "uz": "Uzbek", "tg": "Tajik", "mn": "Mongolian",
+
+    # South Asian languages
+    "bn": "Bengali", "te": "Telugu", "ta": "Tamil", "ml": "Malayalam",
+    "kn": "Kannada", "gu": "Gujarati", "pa": "Punjabi", "ne": "Nepali",
+    "si": "Sinhala",
+
+    # Southeast Asian languages
+    "th": "Thai", "vi": "Vietnamese", "my": "Burmese", "km": "Khmer",
+    "lo": "Lao", "tr": "Turkish",
+
+    # Middle Eastern languages
+    "fa": "Persian", "he": "Hebrew", "ka": "Georgian", "am": "Amharic",
+
+    "auto": "auto-detected language"
+})
+
+
+# Caché de traducciones terminadas (LRU): número de entradas y longitud máxima del texto cacheado
+_TRANSLATION_CACHE_SIZE = 1024
+_TRANSLATION_CACHE_MAX_CHARS = 256
+
+# Memoria en caché de MLX (MB) a partir de la cual se vacía tras una traducción
+_CACHE_CLEAR_THRESHOLD_MB = 1024
+
+# ✅ PATRONES PRECOMPILADOS - se reutilizan en cada traducción
+# Detección de idioma por conjunto de caracteres
+_CYRILLIC_RE = re.compile(r'[а-яА-Я]')
+_CHINESE_RE = re.compile(r'[一-龯]|[\u4e00-\u9fff]')
+_KANA_RE = re.compile(r'[ぁ-んァ-ン]')
+_HANGUL_RE = re.compile(r'[가-힣]')
+_HEBREW_RE = re.compile(r'[א-ת]')
+_ARABIC_RE = re.compile(r'[ا-ي]')
+_THAI_RE = re.compile(r'[ก-๙]')
+
+# Marcadores de idiomas europeos (se comparan contra el conjunto de caracteres del texto)
+_EUROPEAN_DIACRITICS = frozenset('áàâäãåāăąèéêëēėęîïíīįìôöòóœøōõùúûüūğçćčñńňşšßžźż')
+_SPANISH_ACCENTS = frozenset('áéíóú')
+_FRENCH_CHARS = frozenset('àâçéèêëîïôùûüÿ')
+_GERMAN_CHARS = frozenset('äöüß')
+_ITALIAN_CHARS = frozenset('àèéìíîòóù')
+_PORTUGUESE_CHARS = frozenset('ãõáéíóúçà')
+
+# ✅ DETECTAR Y REMOVER EXPLICACIONES DE IA
+_EXPLANATION_PATTERNS = (
+    # Inglés
+    r"This translation conveys.*",
+    r"This conveys.*",
+    r"The translation.*",
+    r"This translates to.*",
+    r"This means.*",
+    r"In Spanish.*",
+    r"In English.*",
+    r"Note:.*",
+    r"Note that.*",
+    r"It should be noted.*",
+    r"Please note.*",
+    r"This phrase.*",
+    r"The phrase.*",
+    r"The meaning.*",
+    r"This expression.*",
+    r"In this context.*",
+    r"Here.*translation.*",
+    r"The above.*",
+    r"This captures.*",
+    r"This maintains.*",
+    r"This preserves.*",
+    r"This reflects.*",
+    
+    # Español
+    r"Esta traducción.*",
+    r"Esta frase.*",
+    r"El significado.*",
+    r"En español.*",
+    r"En inglés.*",
+    r"Nota:.*",
+    r"Cabe señalar.*",
+    r"Es importante.*",
+    r"La traducción.*",
+    r"Esto significa.*",
+    r"Esta expresión.*",
+    r"En este contexto.*",
+    r"La frase.*",
+    r"Esto transmite.*",
+    r"Esto mantiene.*",
+    r"Esto preserva.*",
+    r"Esto refleja.*",
+    
+    # Francés
+    r"Cette traduction.*",
+    r"Cette phrase.*",
+    r"Le sens.*",
+    r"En français.*",
+    r"En anglais.*",
+    r"Note:.*",
+    r"Il convient.*",
+    r"La traduction.*",
+    r"Cela signifie.*",
+    r"Cette expression.*",
+    
+    # Alemán
+    r"Diese Übersetzung.*",
+    r"Dieser Satz.*",
+    r"Die Bedeutung.*",
+    r"Auf Deutsch.*",
+    r"Auf Englisch.*",
+    r"Hinweis:.*",
+    r"Es ist wichtig.*",
+    r"Die Übersetzung.*",
+    
+    # Italiano
+    r"Questa traduzione.*",
+    r"Questa frase.*",
+    r"Il significato.*",
+    r"In italiano.*",
+    r"In inglese.*",
+    r"Nota:.*",
+    r"È importante.*",
+    r"La traduzione.*",
+    
+    # Portugués
+    r"Esta tradução.*",
+    r"Esta frase.*",
+    r"O significado.*",
+    r"Em português.*",
+    r"Em inglês.*",
+    r"Nota:.*",
+    r"É importante.*",
+    r"A tradução.*",
+    
+    # Patrones genéricos
+    r"\(.*explains.*\)",
+    r"\(.*explanation.*\)",
+    r"\(.*translation.*\)",
+    r"\(.*note.*\)",
+    r"\(.*nota.*\)",
+    r"\".*translation.*\"$",
+    r"\".*explains.*\"$",
+    r"\".*conveys.*\"$",
+    r"\".*transmite.*\"$",
+    r"\".*significa.*\"$",
+    r"^(This|Esta|Cette|Diese|Questa|Esta)\s+(translation|traducción|traduction|Übersetzung|traduzione|tradução).*",
+    
+    # Patrones de fin de explicación
+    r"\..*This is.*$",
+    r"\..*Esto es.*$",
+    r"\..*C'est.*$",
+    r"\..*Das ist.*$",
+    r"\..*Questo è.*$",
+    r"\..*Isto é.*$"
+)
+
+# Una sola alternativa con todos los patrones: una pasada encuentra la explicación más temprana
+_EXPLANATION_RE = re.compile(
+    '|'.join('(?:%s)' % pattern for pattern in _EXPLANATION_PATTERNS), re.IGNORECASE | re.DOTALL
+)
+
+# Repeticiones excesivas de puntuación y de palabras/frases
+_PUNCT_REPETITION_RE = re.compile(r'([!?.,;:\-_=+])\1{10,}')
+_WORD_REPETITION_RE = re.compile(r'\b(\w+(?:\s+\w+){0,2})\s+(?:\1\s+){3,}', re.IGNORECASE)
+
+# Separador de oraciones para el recorte de oraciones múltiples
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+\s+')
+
+# Comillas, puntuación y paréntesis sueltos que se quitan de los extremos en la limpieza final
+_TRAILING_STRIP = ' "\'`.,:-*()[]{}'
+
+# ✅ NOTAS AL FINAL DE LA TRADUCCIÓN ("NOTA:", "Note.", "(Nota)", ...)
+# Una sola alternativa: NOTA/NOTE/NOTAS/NOTES seguidas de ":" o ".", o "(NOTA)"/"(NOTE)", hasta el final
+_NOTE_END_RE = re.compile(r'\s*(?:(?:NOTA|NOTE|NOTAS|NOTES)\s*[:.]|\((?:NOTA|NOTE)\)).*$', re.IGNORECASE)
+
+# Mezclas de idiomas obvias en una traducción (una sola alternativa, sin distinguir mayúsculas)
+_MIXED_LANGUAGE_RE = re.compile(
+    r"c'è\s+la\s+"  # Italiano mezclado con otro idioma
+    r"|\w+\s+la\s+armi"  # Patrones específicos sin sentido
+    r"|[а-я]+\s+[a-z]+\s+[а-я]+"  # Cirílico mezclado
+    r"|[一-龯]\s+[a-z]+\s+[一-龯]",  # Chino mezclado
+    re.IGNORECASE
+)
+
+# Todo lo que no es letra, dígito o espacio
+_NONWORD_RE = re.compile(r'[^\w\s]')
+
+# Más de una palabra: dos tramos sin espacios separados por espacio (sin construir la lista de split())
+_MULTI_WORD_RE = re.compile(r'\S\s+\S')
+
+# Tokens de fin y restos del prompt: la salida se corta en la primera aparición de cualquiera
+_END_TOKENS = ("<|endoftext|>", "</s>", "<|end|>", "<|im_end|>", "[INST]", "[/INST]")
+_LEAKED_PROMPT_MARKERS = (
+    "Human:", "Assistant:", "Translation:", "Traducción:", "Traduction:", 
+    "Übersetzung:", "Traduzione:", "Tradução:", "Перевод:", "翻译:", 
+    "To translate", "Para traducir", "Pour traduire", "Um zu übersetzen",
+    "I'll translate", "Voy a traducir", "Je vais traduire",
+    "The translation", "La traducción", "La traduction"
+)
+_END_TOKEN_RE = re.compile('|'.join(map(re.escape, _END_TOKENS)))
+_LEAKED_PROMPT_RE = re.compile('|'.join(map(re.escape, _LEAKED_PROMPT_MARKERS)))
+
+# Etiquetas de idioma al principio de la respuesta (tal cual y en minúsculas)
+_LANG_MARKER_NAMES = (
+    "Spanish:", "English:", "French:", "German:", 
+    "Italian:", "Portuguese:", "Russian:", "Chinese:",
+    "Japanese:", "Korean:", "Arabic:", "Hindi:",
+    "Español:", "Inglés:", "Francés:", "Alemán:",
+    "Italiano:", "Portugués:", "Ruso:", "Chino:"
+)
+_LANG_MARKERS = _LANG_MARKER_NAMES + tuple(marker.lower() for marker in _LANG_MARKER_NAMES)
+
+# Texto que debe aparecer para que coincida alguna explicación, prompt filtrado o nota final.
+# Si no aparece ninguno (el caso habitual), esas pasadas de limpieza se omiten.
+_SUSPICIOUS_MARKERS = (
+    # Explicaciones
+    "this", "esta", "esto", "cette", "diese", "questa", "here", "note", "nota", "hinweis",
+    "the translation", "the phrase", "the meaning", "the above", "it should be noted", "please note",
+    "in spanish", "in english", "in this context", "in italiano", "in inglese",
+    "el significado", "en español", "en inglés", "en este contexto", "en français", "en anglais",
+    "cabe señalar", "es importante", "la traducción", "la frase", "le sens", "il convient",
+    "la traduction", "cela signifie", "die bedeutung", "auf deutsch", "auf englisch",
+    "es ist wichtig", "die übersetzung", "il significato", "è importante", "la traduzione",
+    "o significado", "em português", "em inglês", "é importante", "a tradução",
+    "c'est", "das ist", "questo è", "isto é", "(", '"',
+    # Restos del prompt
+    *_LEAKED_PROMPT_MARKERS
+)
+_SUSPICIOUS_RE = re.compile('|'.join(map(re.escape, _SUSPICIOUS_MARKERS)), re.IGNORECASE)
+
+
+# ✅ PROMPTS ESPECÍFICOS PARA EVITAR EXPLICACIONES DE IA
+# Instrucciones estrictas por idioma de destino
+_STRICT_INSTRUCTIONS = {
+    "es": "SOLO traduce el texto marcado. NO agregues explicaciones, NOTAS, comentarios, aclaraciones, o cualquier texto adicional. NUNCA pongas NOTAS. ÚNICAMENTE la traducción.",
+    "en": "ONLY translate the marked text. DO NOT add explanations, NOTES, comments, clarifications, or any additional text. NEVER add NOTES. ONLY the translation.",
+    "fr": "SEULEMENT traduisez le texte marqué. N'ajoutez PAS d'explications, de NOTES, de commentaires, de clarifications ou de texte supplémentaire. JAMAIS de NOTES. SEULEMENT la traduction.",
+    "de": "NUR den markierten Text übersetzen. Fügen Sie KEINE Erklärungen, NOTIZEN, Kommentare, Erläuterungen oder zusätzlichen Text hinzu. NIEMALS NOTIZEN. NUR die Übersetzung.",
+    "it": "SOLO traduci il testo contrassegnato. NON aggiungere spiegazioni, NOTE, commenti, chiarimenti o testo aggiuntivo. MAI NOTE. SOLO la traduzione.",
+    "pt": "APENAS traduza o texto marcado. NÃO adicione explicações, NOTAS, comentários, esclarecimentos ou texto adicional. NUNCA NOTAS. APENAS a tradução.",
+    "ru": "ТОЛЬКО переведите отмеченный текст. НЕ добавляйте объяснений, ПРИМЕЧАНИЙ, комментариев, разъяснений или дополнительного текста. НИКОГДА ПРИМЕЧАНИЙ. ТОЛЬКО перевод.",
+    "zh": "仅翻译标记的文本。不要添加解释、注释、评论、说明或任何额外文本。绝不添加注释。仅翻译。",
+    "ja": "マークされたテキストのみを翻訳してください。説明、注釈、コメント、解説、追加テキストは一切追加しないでください。絶対に注釈を追加しないでください。翻訳のみ。",
+    "ko": "표시된 텍스트만 번역하세요. 설명, 메모, 댓글, 해설 또는 추가 텍스트를 추가하지 마세요. 절대 메모를 추가하지 마세요. 번역만.",
+    "ar": "ترجم النص المحدد فقط. لا تضيف تفسيرات أو ملاحظات أو تعليقات أو توضيحات أو أي نص إضافي. لا تضيف ملاحظات أبداً. الترجمة فقط.",
+    "hi": "केवल चिह्नित पाठ का अनुवाद करें। कोई स्पष्टीकरण, नोट्स, टिप्पणी, स्पष्टीकरण या अतिरिक्त पाठ न जोड़ें। कभी भी नोट्स न जोड़ें। केवल अनुवाद।",
+    "nl": "Vertaal ALLEEN de gemarkeerde tekst. Voeg GEEN uitleg, NOTITIES, commentaar, toelichtingen of extra tekst toe. NOOIT NOTITIES. ALLEEN de vertaling.",
+    "sv": "Översätt ENDAST den markerade texten. Lägg INTE till förklaringar, ANTECKNINGAR, kommentarer, förtydliganden eller extra text. ALDRIG ANTECKNINGAR. ENDAST översättningen.",
+    "da": "Oversæt KUN den markerede tekst. Tilføj IKKE forklaringer, NOTER, kommentarer, præciseringer eller ekstra tekst. ALDRIG NOTER. KUN oversættelsen.",
+    "no": "Oversett KUN den merkede teksten. Ikke legg til forklaringer, NOTATER, kommentarer, avklaringer eller ekstra tekst. ALDRI NOTATER. KUN oversettelsen.",
+    "fi": "Käännä VAIN merkitty teksti. Älä lisää selityksiä, MUISTIINPANOJA, kommentteja, selvennyksiä tai ylimääräistä tekstiä. EI KOSKAAN MUISTIINPANOJA. VAIN käännös.",
+    "pl": "Przetłumacz TYLKO oznaczony tekst. NIE dodawaj wyjaśnień, NOTATEK, komentarzy, wyjaśnień ani dodatkowego tekstu. NIGDY NOTATEK. TYLKO tłumaczenie.",
+    "cs": "Přeložte POUZE označený text. NEPŘIDÁVEJTE vysvětlení, POZNÁMKY, komentáře, objasnění nebo další text. NIKDY POZNÁMKY. POUZE překlad.",
+    "hu": "CSAK a megjelölt szöveget fordítsd le. NE adj hozzá magyarázatokat, JEGYZETEKET, megjegyzéseket, magyarázatokat vagy további szöveget. SOHA JEGYZETEKET. CSAK a fordítás.",
+    "ro": "Traduceți DOAR textul marcat. NU adăugați explicații, NOTE, comentarii, clarificări sau text suplimentar. NICIODATĂ NOTE. DOAR traducerea.",
+    "tr": "SADECE işaretli metni çevirin. Açıklama, NOTLAR, yorumlar, açıklamalar veya ek metin eklemeyin. ASLA NOT EKLEMEYİN. SADECE çeviri."
+}
+_DEFAULT_INSTRUCTION = "ONLY translate the marked text. DO NOT add explanations, notes, comments, clarifications, or any additional text. ONLY the translation."
+
+# ✅ CONTEXTO MEJORADO - Incluir mensaje anterior pero traducir solo el segundo
+_CONTEXT_SECTION_TEMPLATE = """Contexto (mensaje anterior): "{previous}"
+
+IMPORTANTE: El contexto anterior es SOLO para ayudarte a entender mejor el tema. ÚNICAMENTE traduce el texto que aparece después de "Texto a traducir:".
+
+"""
+
+# Otros idiomas -> Inglés: etiqueta del texto en el idioma de origen
+_TO_ENGLISH_LABELS = {
+    "es": "Text to translate (Spanish)", "fr": "Texte à traduire (français)",
+    "de": "Zu übersetzender Text (Deutsch)", "it": "Testo da tradurre (italiano)",
+    "pt": "Texto para traduzir (português)", "ru": "Текст для перевода (русский)",
+    "zh": "要翻译的文本 (中文)", "ja": "翻訳するテキスト (日本語)",
+    "ko": "번역할 텍스트 (한국어)", "ar": "النص المراد ترجمته (العربية)",
+    "hi": "अनुवाद करने के लिए पाठ (हिंदी)", "nl": "Te vertalen tekst (Nederlands)",
+    "sv": "Text att översätta (svenska)", "tr": "Çevrilecek metin (Türkçe)"
+}
+
+# Inglés -> otros idiomas: nombre del idioma de destino
+_FROM_ENGLISH_NAMES = {
+    "fr": "French", "de": "German", "it": "Italian", "pt": "Portuguese",
+    "ru": "Russian", "zh": "Chinese", "ja": "Japanese", "ko": "Korean",
+    "ar": "Arabic", "hi": "Hindi", "nl": "Dutch", "sv": "Swedish", "tr": "Turkish"
+}
+
+# ✅ PROMPTS ESPECÍFICOS POR PAR DE IDIOMAS: (origen, destino) -> plantilla
+_PROMPT_TEMPLATES = {
+    ("en", "es"): 'Instrucciones: {ins}\n\n{ctx}Texto a traducir (inglés): "{text}"\n\nTraducción al español:',
+}
+_PROMPT_TEMPLATES.update({
+    (code, "en"): 'Instructions: {ins}\n\n{ctx}' + label + ': "{text}"\n\nEnglish translation:'
+    for code, label in _TO_ENGLISH_LABELS.items()
+})
+_PROMPT_TEMPLATES.update({
+    ("en", code): 'Instructions: {ins}\n\n{ctx}Text to translate (English): "{text}"\n\n' + name + ' translation:'
+    for code, name in _FROM_ENGLISH_NAMES.items()
+})
+
+# Español -> otros idiomas, otros idiomas -> español y caso genérico
+_FROM_SPANISH_TEMPLATE = 'Instructions: {ins}\n\n{ctx}Texto a traducir (español): "{text}"\n\nTraducción al {tgt}:'
+_TO_SPANISH_TEMPLATE = 'Instrucciones: {ins}\n\n{ctx}Texto a traducir ({src}): "{text}"\n\nTraducción al español:'
+_GENERIC_TEMPLATE = 'Instructions: {ins}\n\n{ctx}Text to translate ({src}): "{text}"\n\nTranslation to {tgt}:'
+
+def _build_context_prompt(source_lang, target_lang, text, previous_text, source_lang_name, target_lang_name):
+    """Build explicit prompts for all languages to avoid AI explanations"""
+    context_section = ""
+    if previous_text and previous_text.strip():
+        context_section = _CONTEXT_SECTION_TEMPLATE.format(previous=previous_text.strip())
+    
+    template = _PROMPT_TEMPLATES.get((source_lang, target_lang))
+    if template is None:
+        if source_lang == "es":
+            template = _FROM_SPANISH_TEMPLATE
+        elif target_lang == "es":
+            template = _TO_SPANISH_TEMPLATE
+        else:
+            template = _GENERIC_TEMPLATE
+    
+    return template.format(
+        ctx=context_section,
+        ins=_STRICT_INSTRUCTIONS.get(target_lang, _DEFAULT_INSTRUCTION),
+        text=text,
+        src=source_lang_name,
+        tgt=target_lang_name
+    )
+
+
+def _approx_word_count(text):
+    """Cheap word count for the token budget (no list allocation)"""
+    return text.count(" ") + 1
+
+
+@functools.lru_cache(maxsize=None)
+def _fallback_prefix(target_language):
+    """'[ES] '-style marker for untranslated fallbacks, built once per language code"""
+    return sys.intern(f"[{target_language.upper()}] ")
+
+# Try to detect source language from text features (simple heuristic)
+# This will be enhanced in future with proper language detection
+@functools.lru_cache(maxsize=512)
+def _detect_source_language(text):
+    """Guess the source language from its script and diacritics (cached)"""
+    # Simple character set based detection for common languages
+    # This is a basic heuristic and should be replaced with proper language detection
+    
+    # ✅ FAST PATH: texto solo ASCII no tiene ningún carácter de los que se buscan abajo
+    if text.isascii():
+        return "en"
+    
+    text = text.lower()
+    
+    # Check for specific character sets
+    if _CYRILLIC_RE.search(text):  # Cyrillic
+        return "ru"  # Russian as default for Cyrillic
+    elif _CHINESE_RE.search(text):  # Chinese characters
+        return "zh"
+    elif _KANA_RE.search(text):  # Japanese kana
+        return "ja"
+    elif _HANGUL_RE.search(text):  # Korean
+        return "ko"
+    elif _HEBREW_RE.search(text):  # Hebrew
+        return "he"
+    elif _ARABIC_RE.search(text):  # Arabic
+        return "ar"
+    elif _THAI_RE.search(text):  # Thai
+        return "th"
+    
+    # European languages: un solo recorrido del texto para saber qué caracteres aparecen
+    present = set(text)
+    if present.isdisjoint(_EUROPEAN_DIACRITICS):
+        return "en"  # Default to English
+    
+    # Check for specific European language markers
+    if 'ñ' in present and not present.isdisjoint(_SPANISH_ACCENTS):
+        return "es"  # Spanish
+    elif not present.isdisjoint(_FRENCH_CHARS):
+        return "fr"  # French
+    elif not present.isdisjoint(_GERMAN_CHARS):
+        return "de"  # German
+    elif not present.isdisjoint(_ITALIAN_CHARS):
+        return "it"  # Italian
+    elif not present.isdisjoint(_PORTUGUESE_CHARS):
+        return "pt"  # Portuguese
+    else:
+        return "en"  # Default to English for Latin script
+
+
+class _RollingStats:
+    """Fixed-size window of samples with an O(1) running mean"""
+    
+    def __init__(self, maxlen):
+        self.buf = deque(maxlen=maxlen)
+        self.sum = 0  # Enteros (nanosegundos): la suma no acumula error de redondeo
+        
+    def append(self, value):
+        if len(self.buf) == self.buf.maxlen:
+            self.sum -= self.buf[0]  # El valor más antiguo sale de la ventana
+        self.buf.append(value)
+        self.sum += value
+        
+    def mean(self):
+        return self.sum / len(self.buf) if self.buf else 0.0
+        
+    def __len__(self):
+        return len(self.buf)
+        
+    def __iter__(self):
+        return iter(self.buf)
+
 
 class TextTranslator:
     """Handles text translation using MLX models"""
     
+    # Models already loaded in this process, shared by every instance: model name -> (model, tokenizer)
+    _MODEL_CACHE = {}
+    
     def __init__(self):
         self.translation_model = None
         self.translation_tokenizer = None
@@ -30,11 +480,17 @@ class TextTranslator:
         self.translation_history = deque(maxlen=10)  # Keep last 10 translations for context
         
         # Timing statistics
-        self.translation_times = deque(maxlen=20)  # Keep last 20 translation times
+        self.translation_times = _RollingStats(20)  # Keep last 20 translation times (ns)
         self.model_load_times = deque(maxlen=5)   # Keep last 5 model load times
         self.total_translations = 0
         self.total_characters_translated = 0
         
+        # LRU cache of finished translations: (text, target_language, previous_text) -> translation
+        self._translation_cache = OrderedDict()
+        
+        # KV caches for the static instruction prefixes: prefix -> (prompt_cache, prefix_tokens) or None
+        self._prompt_caches = {}
+        
         # MLX device info
         self.device = mx.default_device()
         print(f"🔧 MLX Translation using device: {self.device}")
@@ -44,16 +500,25 @@ class TextTranslator:
     def load_translation_model(self):
         """Load MLX translation model (Qwen) with GPU optimization"""
         try:
+            # ✅ Reutilizar el modelo si otra instancia ya lo cargó en este proceso
+            cached = TextTranslator._MODEL_CACHE.get(config.TRANSLATION_MODEL)
+            if cached is not None:
+                self.translation_model, self.translation_tokenizer = cached
+                self._prompt_caches.clear()
+                self._translation_cache.clear()
+                print(f"✅ Reusing loaded translation model: {config.TRANSLATION_MODEL}")
+                return
+            
             print(f"🔄 Loading translation model: {config.TRANSLATION_MODEL}")
             print(f"🔧 Target device: {self.device}")
-            load_start_time = time.time()
-            
-            # Clear MLX cache before loading
-            mx.clear_cache()
+            load_start_ns = time.perf_counter_ns()
             
             self.translation_model, self.translation_tokenizer = load(config.TRANSLATION_MODEL)
+            self._prompt_caches.clear()  # Caches belong to the previous model
+            self._translation_cache.clear()
+            TextTranslator._MODEL_CACHE[config.TRANSLATION_MODEL] = (self.translation_model, self.translation_tokenizer)
             
-            load_time = time.time() - load_start_time
+            load_time = (time.perf_counter_ns() - load_start_ns) / 1e9
             self.model_load_times.append(load_time)
             
             # Check memory usage after loading
@@ -64,12 +529,24 @@ class TextTranslator:
                 print(f"🔧 GPU Memory - Peak: {peak_memory:.1f} MB, Cache: {cache_memory:.1f} MB")
             except Exception as e:
                 print(f"✅ Translation model loaded successfully in {load_time:.2f}s")
-                if config.ENABLE_DEBUG_LOGGING:
-                    print(f"Memory info not available: {e}")
+                logger.debug("Memory info not available: %s", e)
+            
+            # ✅ WARM-UP: una generación mínima compila los kernels de Metal antes de la primera traducción real
+            try:
+                warmup_start_ns = time.perf_counter_ns()
+                generate(
+                    self.translation_model,
+                    self.translation_tokenizer,
+                    prompt="Hi",
+                    max_tokens=1,
+                    verbose=False
+                )
+                logger.debug("🔥 Translation model warmed up in %.2fs", (time.perf_counter_ns() - warmup_start_ns) / 1e9)
+            except Exception as e:
+                logger.debug("Warm-up skipped: %s", e)
             
-            if config.ENABLE_DEBUG_LOGGING:
-                print(f"Model details: {config.TRANSLATION_MODEL}")
-                print(f"Model device: {self.device}")
+            logger.debug("Model details: %s", config.TRANSLATION_MODEL)
+            logger.debug("Model device: %s", self.device)
                 
         except Exception as e:
             print(f"❌ Error loading translation model: {e}")
@@ -79,724 +556,297 @@ class TextTranslator:
         """Translate text using MLX model with GPU optimization and optional context"""
         if not text.strip():
             return ""
+        
+        # ✅ Repeticiones exactas (reintentos, subtítulos repetidos) salen de la caché sin pasar por el modelo
+        cache_key = (text, target_language, previous_text)
+        cached = self._translation_cache.get(cache_key)
+        if cached is not None:
+            self._translation_cache.move_to_end(cache_key)
+            logger.debug("♻️  Cached translation: '%s' -> '%s'", text[:30], cached[:30])
+            return cached
             
         try:
             if self.translation_model is None:
                 print(f"⚠️  Translation model not loaded, using fallback for: '{text[:30]}...'")
-                return f"[{target_language.upper()}] {text}"
+                return _fallback_prefix(target_language) + text
                 
             # Start timing
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
             
             # Log translation request with context info
             context_info = f" (with context)" if previous_text else ""
             print(f"🌐 Starting translation{context_info}: '{text[:50]}{'...' if len(text) > 50 else ''}' -> {target_language.upper()}")
             
-            # Comprehensive language code mapping
-            language_names = {
-                # Major languages
-                "es": "Spanish", "en": "English", "fr": "French", "de": "German", 
-                "it": "Italian", "pt": "Portuguese", "ru": "Russian", "zh": "Chinese",
-                "ja": "Japanese", "ko": "Korean", "ar": "Arabic", "hi": "Hindi",
-                
-                # European languages
-                "nl": "Dutch", "sv": "Swedish", "da": "Danish", "no": "Norwegian",
-                "fi": "Finnish", "pl": "Polish", "cs": "Czech", "hu": "Hungarian",
-                "ro": "Romanian", "bg": "Bulgarian", "hr": "Croatian", "sk": "Slovak",
-                "sl": "Slovenian", "et": "Estonian", "lv": "Latvian", "lt": "Lithuanian",
-                "mt": "Maltese", "cy": "Welsh", "ga": "Irish", "is": "Icelandic",
-                
-                # Regional Spanish/European languages
-                "ca": "Catalan", "eu": "Basque", "gl": "Galician",
-                
-                # Slavic languages
-                "mk": "Macedonian", "sq": "Albanian", "sr": "Serbian", 
-                "uk": "Ukrainian", "be": "Belarusian",
-                
-                # Central Asian languages
-                "kk": "Kazakh", "ky": "Kyrgyz", "uz": "Uzbek", "tg": "Tajik", "mn": "Mongolian",
-                
-                # South Asian languages
-                "bn": "Bengali", "te": "Telugu", "ta": "Tamil", "ml": "Malayalam",
-                "kn": "Kannada", "gu": "Gujarati", "pa": "Punjabi", "ne": "Nepali",
-                "si": "Sinhala",
-                
-                # Southeast Asian languages
-                "th": "Thai", "vi": "Vietnamese", "my": "Burmese", "km": "Khmer",
-                "lo": "Lao", "tr": "Turkish",
-                
-                # Middle Eastern languages
-                "fa": "Persian", "he": "Hebrew", "ka": "Georgian", "am": "Amharic",
-                
-                "auto": "auto-detected language"
-            }
-            
-            target_lang_name = language_names.get(target_language, target_language.capitalize())
-            
-            # Try to detect source language from text features (simple heuristic)
-            # This will be enhanced in future with proper language detection
-            def detect_source_language(text):
-                # Simple character set based detection for common languages
-                # This is a basic heuristic and should be replaced with proper language detection
-                text = text.lower()
-                
-                # Check for specific character sets
-                if re.search(r'[а-яА-Я]', text):  # Cyrillic
-                    return "ru"  # Russian as default for Cyrillic
-                elif re.search(r'[一-龯]', text) or re.search(r'[\u4e00-\u9fff]', text):  # Chinese characters
-                    return "zh"
-                elif re.search(r'[ぁ-んァ-ン]', text):  # Japanese kana
-                    return "ja"
-                elif re.search(r'[가-힣]', text):  # Korean
-                    return "ko"
-                elif re.search(r'[א-ת]', text):  # Hebrew
-                    return "he"
-                elif re.search(r'[ا-ي]', text):  # Arabic
-                    return "ar"
-                elif re.search(r'[ก-๙]', text):  # Thai
-                    return "th"
-                # European languages
-                elif re.search(r'[áàâäãåāăąèéêëēėęîïíīįìôöòóœøōõùúûüūğçćčñńňşšßžźż]', text):
-                    # Check for specific European language markers
-                    if re.search(r'[ñ]', text) and re.search(r'[áéíóú]', text):
-                        return "es"  # Spanish
-                    elif re.search(r'[àâçéèêëîïôùûüÿ]', text):
-                        return "fr"  # French
-                    elif re.search(r'[äöüß]', text):
-                        return "de"  # German
-                    elif re.search(r'[àèéìíîòóù]', text):
-                        return "it"  # Italian
-                    elif re.search(r'[ãõáéíóúçà]', text):
-                        return "pt"  # Portuguese
-                    else:
-                        return "en"  # Default to English for Latin script
-                else:
-                    return "en"  # Default to English
+            # Los códigos del UI llegan como cadenas nuevas; internados, las búsquedas en las tablas
+            # de idiomas y plantillas se resuelven por identidad
+            target_language = sys.intern(target_language)
+            target_lang_name = _LANGUAGE_NAMES.get(target_language, target_language.capitalize())
             
             # Get source language
-            source_lang = detect_source_language(text)
-            source_lang_name = language_names.get(source_lang, "unknown language")
-            
-            # Build context-aware prompts
-            def build_context_prompt(source_lang, target_lang, text, previous_text=None):
-                """Build explicit prompts for all languages to avoid AI explanations"""
-                
-                # ✅ CONTEXTO MEJORADO - Incluir mensaje anterior pero traducir solo el segundo
-                context_section = ""
-                if previous_text and previous_text.strip():
-                    context_section = f"""Contexto (mensaje anterior): "{previous_text.strip()}"
-
-IMPORTANTE: El contexto anterior es SOLO para ayudarte a entender mejor el tema. ÚNICAMENTE traduce el texto que aparece después de "Texto a traducir:".
-
-"""
-                
-                # ✅ PROMPTS ESPECÍFICOS PARA EVITAR EXPLICACIONES DE IA
-                # Definir instrucciones estrictas por idioma de destino
-                strict_instructions = {
-                    "es": "SOLO traduce el texto marcado. NO agregues explicaciones, NOTAS, comentarios, aclaraciones, o cualquier texto adicional. NUNCA pongas NOTAS. ÚNICAMENTE la traducción.",
-                    "en": "ONLY translate the marked text. DO NOT add explanations, NOTES, comments, clarifications, or any additional text. NEVER add NOTES. ONLY the translation.",
-                    "fr": "SEULEMENT traduisez le texte marqué. N'ajoutez PAS d'explications, de NOTES, de commentaires, de clarifications ou de texte supplémentaire. JAMAIS de NOTES. SEULEMENT la traduction.",
-                    "de": "NUR den markierten Text übersetzen. Fügen Sie KEINE Erklärungen, NOTIZEN, Kommentare, Erläuterungen oder zusätzlichen Text hinzu. NIEMALS NOTIZEN. NUR die Übersetzung.",
-                    "it": "SOLO traduci il testo contrassegnato. NON aggiungere spiegazioni, NOTE, commenti, chiarimenti o testo aggiuntivo. MAI NOTE. SOLO la traduzione.",
-                    "pt": "APENAS traduza o texto marcado. NÃO adicione explicações, NOTAS, comentários, esclarecimentos ou texto adicional. NUNCA NOTAS. APENAS a tradução.",
-                    "ru": "ТОЛЬКО переведите отмеченный текст. НЕ добавляйте объяснений, ПРИМЕЧАНИЙ, комментариев, разъяснений или дополнительного текста. НИКОГДА ПРИМЕЧАНИЙ. ТОЛЬКО перевод.",
-                    "zh": "仅翻译标记的文本。不要添加解释、注释、评论、说明或任何额外文本。绝不添加注释。仅翻译。",
-                    "ja": "マークされたテキストのみを翻訳してください。説明、注釈、コメント、解説、追加テキストは一切追加しないでください。絶対に注釈を追加しないでください。翻訳のみ。",
-                    "ko": "표시된 텍스트만 번역하세요. 설명, 메모, 댓글, 해설 또는 추가 텍스트를 추가하지 마세요. 절대 메모를 추가하지 마세요. 번역만.",
-                    "ar": "ترجم النص المحدد فقط. لا تضيف تفسيرات أو ملاحظات أو تعليقات أو توضيحات أو أي نص إضافي. لا تضيف ملاحظات أبداً. الترجمة فقط.",
-                    "hi": "केवल चिह्नित पाठ का अनुवाद करें। कोई स्पष्टीकरण, नोट्स, टिप्पणी, स्पष्टीकरण या अतिरिक्त पाठ न जोड़ें। कभी भी नोट्स न जोड़ें। केवल अनुवाद।",
-                    "nl": "Vertaal ALLEEN de gemarkeerde tekst. Voeg GEEN uitleg, NOTITIES, commentaar, toelichtingen of extra tekst toe. NOOIT NOTITIES. ALLEEN de vertaling.",
-                    "sv": "Översätt ENDAST den markerade texten. Lägg INTE till förklaringar, ANTECKNINGAR, kommentarer, förtydliganden eller extra text. ALDRIG ANTECKNINGAR. ENDAST översättningen.",
-                    "da": "Oversæt KUN den markerede tekst. Tilføj IKKE forklaringer, NOTER, kommentarer, præciseringer eller ekstra tekst. ALDRIG NOTER. KUN oversættelsen.",
-                    "no": "Oversett KUN den merkede teksten. Ikke legg til forklaringer, NOTATER, kommentarer, avklaringer eller ekstra tekst. ALDRI NOTATER. KUN oversettelsen.",
-                    "fi": "Käännä VAIN merkitty teksti. Älä lisää selityksiä, MUISTIINPANOJA, kommentteja, selvennyksiä tai ylimääräistä tekstiä. EI KOSKAAN MUISTIINPANOJA. VAIN käännös.",
-                    "pl": "Przetłumacz TYLKO oznaczony tekst. NIE dodawaj wyjaśnień, NOTATEK, komentarzy, wyjaśnień ani dodatkowego tekstu. NIGDY NOTATEK. TYLKO tłumaczenie.",
-                    "cs": "Přeložte POUZE označený text. NEPŘIDÁVEJTE vysvětlení, POZNÁMKY, komentáře, objasnění nebo další text. NIKDY POZNÁMKY. POUZE překlad.",
-                    "hu": "CSAK a megjelölt szöveget fordítsd le. NE adj hozzá magyarázatokat, JEGYZETEKET, megjegyzéseket, magyarázatokat vagy további szöveget. SOHA JEGYZETEKET. CSAK a fordítás.",
-                    "ro": "Traduceți DOAR textul marcat. NU adăugați explicații, NOTE, comentarii, clarificări sau text suplimentar. NICIODATĂ NOTE. DOAR traducerea.",
-                    "tr": "SADECE işaretli metni çevirin. Açıklama, NOTLAR, yorumlar, açıklamalar veya ek metin eklemeyin. ASLA NOT EKLEMEYİN. SADECE çeviri."
-                }
-                
-                # Obtener instrucción estricta
-                instruction = strict_instructions.get(target_lang, "ONLY translate the marked text. DO NOT add explanations, notes, comments, clarifications, or any additional text. ONLY the translation.")
-                
-                # ✅ PROMPTS ESPECÍFICOS POR PAR DE IDIOMAS CON CONTEXTO MEJORADO
-                # Inglés -> Español
-                if source_lang == "en" and target_lang == "es":
-                    return f"""{context_section}Instrucciones: {instruction}
-
-Texto a traducir (inglés): "{text}"
-
-Traducción al español:"""
-                
-                # Español -> Inglés
-                elif source_lang == "es" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (Spanish): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Francés
-                elif source_lang == "en" and target_lang == "fr":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-French translation:"""
-                
-                # Francés -> Inglés
-                elif source_lang == "fr" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Texte à traduire (français): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Alemán
-                elif source_lang == "en" and target_lang == "de":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-German translation:"""
-                
-                # Alemán -> Inglés
-                elif source_lang == "de" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Zu übersetzender Text (Deutsch): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Italiano
-                elif source_lang == "en" and target_lang == "it":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Italian translation:"""
-                
-                # Italiano -> Inglés
-                elif source_lang == "it" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Testo da tradurre (italiano): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Portugués
-                elif source_lang == "en" and target_lang == "pt":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Portuguese translation:"""
-                
-                # Portugués -> Inglés
-                elif source_lang == "pt" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Texto para traduzir (português): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Ruso
-                elif source_lang == "en" and target_lang == "ru":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Russian translation:"""
-                
-                # Ruso -> Inglés
-                elif source_lang == "ru" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Текст для перевода (русский): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Chino
-                elif source_lang == "en" and target_lang == "zh":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Chinese translation:"""
-                
-                # Chino -> Inglés
-                elif source_lang == "zh" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-要翻译的文本 (中文): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Japonés
-                elif source_lang == "en" and target_lang == "ja":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Japanese translation:"""
-                
-                # Japonés -> Inglés
-                elif source_lang == "ja" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-翻訳するテキスト (日本語): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Coreano
-                elif source_lang == "en" and target_lang == "ko":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Korean translation:"""
-                
-                # Coreano -> Inglés
-                elif source_lang == "ko" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-번역할 텍스트 (한국어): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Árabe
-                elif source_lang == "en" and target_lang == "ar":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Arabic translation:"""
-                
-                # Árabe -> Inglés
-                elif source_lang == "ar" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-النص المراد ترجمته (العربية): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Hindi
-                elif source_lang == "en" and target_lang == "hi":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Hindi translation:"""
-                
-                # Hindi -> Inglés
-                elif source_lang == "hi" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-अनुवाद करने के लिए पाठ (हिंदी): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Holandés
-                elif source_lang == "en" and target_lang == "nl":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Dutch translation:"""
-                
-                # Holandés -> Inglés
-                elif source_lang == "nl" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Te vertalen tekst (Nederlands): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Sueco
-                elif source_lang == "en" and target_lang == "sv":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Swedish translation:"""
-                
-                # Sueco -> Inglés
-                elif source_lang == "sv" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text att översätta (svenska): "{text}"
-
-English translation:"""
-                
-                # Inglés -> Turco
-                elif source_lang == "en" and target_lang == "tr":
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate (English): "{text}"
-
-Turkish translation:"""
-                
-                # Turco -> Inglés
-                elif source_lang == "tr" and target_lang == "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Çevrilecek metin (Türkçe): "{text}"
-
-English translation:"""
-                
-                # Español -> otros idiomas
-                elif source_lang == "es" and target_lang != "en":
-                    return f"""{context_section}Instructions: {instruction}
-
-Texto a traducir (español): "{text}"
-
-Traducción al {target_lang_name}:"""
-                
-                # Otros idiomas -> Español
-                elif target_lang == "es" and source_lang != "en":
-                    return f"""{context_section}Instrucciones: {instruction}
-
-Texto a traducir ({source_lang_name}): "{text}"
-
-Traducción al español:"""
-                
-                # Caso genérico con instrucciones estrictas
-                else:
-                    return f"""{context_section}Instructions: {instruction}
-
-Text to translate ({source_lang_name}): "{text}"
-
-Translation to {target_lang_name}:"""
+            source_lang = _detect_source_language(text)
+            source_lang_name = _LANGUAGE_NAMES.get(source_lang, "unknown language")
             
             # Build the prompt with context
-            prompt = build_context_prompt(source_lang, target_language, text, previous_text)
+            prompt = _build_context_prompt(source_lang, target_language, text, previous_text,
+                                           source_lang_name, target_lang_name)
             
-            if config.ENABLE_DEBUG_LOGGING:
-                print(f"Using context-aware prompt for {source_lang}->{target_language}")
-                if previous_text:
-                    print(f"Context: '{previous_text[:30]}...'")
+            logger.debug("Using context-aware prompt for %s->%s", source_lang, target_language)
+            if previous_text:
+                logger.debug("Context: '%s...'", previous_text[:30])
             
             # Measure prompt preparation time
-            prompt_time = time.time() - start_time
+            prompt_time = (time.perf_counter_ns() - start_ns) / 1e9
             
             # Optimized generation parameters for GPU performance
             try:
                 # Start model generation timing
-                generation_start_time = time.time()
+                generation_start_ns = time.perf_counter_ns()
                 
                 # Generate translation with conservative parameters
-                response = generate(
-                    self.translation_model,
-                    self.translation_tokenizer,
-                    prompt=prompt,
-                    max_tokens=min(200, len(text.split()) * 8),  # ✅ Aumentado de 120 a 200 y de 6x a 8x
-                    verbose=False
+                response = self._generate_translation(
+                    prompt,
+                    max_tokens=min(200, _approx_word_count(text) * 8)  # ✅ Aumentado de 120 a 200 y de 6x a 8x
                 )
                 
-                generation_time = time.time() - generation_start_time
+                generation_time = (time.perf_counter_ns() - generation_start_ns) / 1e9
                 
-                if config.ENABLE_DEBUG_LOGGING:
-                    print(f"Translation raw response: '{response}'")
-                    print(f"🔧 Generation time: {generation_time:.3f}s on {self.device}")
+                logger.debug("Translation raw response: '%s'", response)
+                logger.debug("🔧 Generation time: %.3fs on %s", generation_time, self.device)
                 
                 # Start post-processing timing
-                postprocess_start_time = time.time()
-                
-                # Enhanced cleanup for context-aware translations
-                translated = response.strip()
-                
-                # Remove common end tokens and artifacts
-                end_tokens = ["<|endoftext|>", "</s>", "<|end|>", "<|im_end|>", "[INST]", "[/INST]"]
-                for token in end_tokens:
-                    if token in translated:
-                        translated = translated.split(token)[0].strip()
-                
-                # ✅ DETECTAR Y REMOVER EXPLICACIONES DE IA
-                explanation_patterns = [
-                    # Inglés
-                    r"This translation conveys.*",
-                    r"This conveys.*",
-                    r"The translation.*",
-                    r"This translates to.*",
-                    r"This means.*",
-                    r"In Spanish.*",
-                    r"In English.*",
-                    r"Note:.*",
-                    r"Note that.*",
-                    r"It should be noted.*",
-                    r"Please note.*",
-                    r"This phrase.*",
-                    r"The phrase.*",
-                    r"The meaning.*",
-                    r"This expression.*",
-                    r"In this context.*",
-                    r"Here.*translation.*",
-                    r"The above.*",
-                    r"This captures.*",
-                    r"This maintains.*",
-                    r"This preserves.*",
-                    r"This reflects.*",
-                    
-                    # Español
-                    r"Esta traducción.*",
-                    r"Esta frase.*",
-                    r"El significado.*",
-                    r"En español.*",
-                    r"En inglés.*",
-                    r"Nota:.*",
-                    r"Cabe señalar.*",
-                    r"Es importante.*",
-                    r"La traducción.*",
-                    r"Esto significa.*",
-                    r"Esta expresión.*",
-                    r"En este contexto.*",
-                    r"La frase.*",
-                    r"Esto transmite.*",
-                    r"Esto mantiene.*",
-                    r"Esto preserva.*",
-                    r"Esto refleja.*",
-                    
-                    # Francés
-                    r"Cette traduction.*",
-                    r"Cette phrase.*",
-                    r"Le sens.*",
-                    r"En français.*",
-                    r"En anglais.*",
-                    r"Note:.*",
-                    r"Il convient.*",
-                    r"La traduction.*",
-                    r"Cela signifie.*",
-                    r"Cette expression.*",
-                    
-                    # Alemán
-                    r"Diese Übersetzung.*",
-                    r"Dieser Satz.*",
-                    r"Die Bedeutung.*",
-                    r"Auf Deutsch.*",
-                    r"Auf Englisch.*",
-                    r"Hinweis:.*",
-                    r"Es ist wichtig.*",
-                    r"Die Übersetzung.*",
-                    
-                    # Italiano
-                    r"Questa traduzione.*",
-                    r"Questa frase.*",
-                    r"Il significato.*",
-                    r"In italiano.*",
-                    r"In inglese.*",
-                    r"Nota:.*",
-                    r"È importante.*",
-                    r"La traduzione.*",
-                    
-                    # Portugués
-                    r"Esta tradução.*",
-                    r"Esta frase.*",
-                    r"O significado.*",
-                    r"Em português.*",
-                    r"Em inglês.*",
-                    r"Nota:.*",
-                    r"É importante.*",
-                    r"A tradução.*",
-                    
-                    # Patrones genéricos
-                    r"\(.*explains.*\)",
-                    r"\(.*explanation.*\)",
-                    r"\(.*translation.*\)",
-                    r"\(.*note.*\)",
-                    r"\(.*nota.*\)",
-                    r"\".*translation.*\"$",
-                    r"\".*explains.*\"$",
-                    r"\".*conveys.*\"$",
-                    r"\".*transmite.*\"$",
-                    r"\".*significa.*\"$",
-                    r"^(This|Esta|Cette|Diese|Questa|Esta)\s+(translation|traducción|traduction|Übersetzung|traduzione|tradução).*",
-                    
-                    # Patrones de fin de explicación
-                    r"\..*This is.*$",
-                    r"\..*Esto es.*$",
-                    r"\..*C'est.*$",
-                    r"\..*Das ist.*$",
-                    r"\..*Questo è.*$",
-                    r"\..*Isto é.*$"
-                ]
-                
-                for pattern in explanation_patterns:
-                    # Buscar y remover explicaciones al final
-                    match = re.search(pattern, translated, re.IGNORECASE | re.DOTALL)
-                    if match:
-                        translated = translated[:match.start()].strip()
-                        print(f"🧹 Removed AI explanation: '{match.group()[:30]}...'")
-                        break
-                
-                # ✅ DETECTAR Y LIMPIAR REPETICIONES EXCESIVAS MEJORADO
-                # Detectar repeticiones de signos de puntuación
-                punct_repetition = r'([!?.,;:\-_=+])\1{10,}'
-                if re.search(punct_repetition, translated):
-                    translated = re.sub(punct_repetition, r'\1', translated)
-                    print(f"🧹 Removed excessive punctuation repetition")
-                
-                # Detectar repeticiones de palabras/frases
-                word_repetition = r'\b(\w+(?:\s+\w+){0,2})\s+(?:\1\s+){3,}'
-                if re.search(word_repetition, translated, re.IGNORECASE):
-                    # Tomar solo la primera ocurrencia antes de la repetición
-                    match = re.search(word_repetition, translated, re.IGNORECASE)
-                    if match:
-                        translated = translated[:match.start()].strip()
-                        print(f"🧹 Removed excessive word repetition pattern")
-                
-                # Remove training artifacts and prompts that sometimes leak through
-                cleanup_prefixes = [
-                    "Human:", "Assistant:", "Translation:", "Traducción:", "Traduction:", 
-                    "Übersetzung:", "Traduzione:", "Tradução:", "Перевод:", "翻译:", 
-                    "To translate", "Para traducir", "Pour traduire", "Um zu übersetzen",
-                    "I'll translate", "Voy a traducir", "Je vais traduire",
-                    "The translation", "La traducción", "La traduction"
-                ]
-                
-                for prefix in cleanup_prefixes:
-                    if prefix in translated:
-                        translated = translated.split(prefix)[0].strip()
-                
-                # Language-specific cleanup - remove prompt markers
-                lang_markers = {
-                    "Spanish:": "", "English:": "", "French:": "", "German:": "", 
-                    "Italian:": "", "Portuguese:": "", "Russian:": "", "Chinese:": "",
-                    "Japanese:": "", "Korean:": "", "Arabic:": "", "Hindi:": "",
-                    "Español:": "", "Inglés:": "", "Francés:": "", "Alemán:": "",
-                    "Italiano:": "", "Portugués:": "", "Ruso:": "", "Chino:": ""
-                }
-                
-                for marker in lang_markers:
-                    if translated.startswith(marker):
-                        translated = translated[len(marker):].strip()
-                        break
-                    # Also check for lowercase versions
-                    if translated.startswith(marker.lower()):
-                        translated = translated[len(marker):].strip()
-                        break
-                
-                # Remove quotes if the entire translation is wrapped in them
-                if ((translated.startswith('"') and translated.endswith('"')) or 
-                    (translated.startswith("'") and translated.endswith("'"))):
-                    translated = translated[1:-1].strip()
+                postprocess_start_ns = time.perf_counter_ns()
                 
-                # ✅ MANEJO MEJORADO DE ORACIONES MÚLTIPLES - MENOS AGRESIVO
-                # Solo cortar si hay evidencia clara de que es un error (muchas oraciones muy cortas)
-                sentences = re.split(r'[.!?]+\s+', translated)
-                if len(sentences) > 4:  # Más de 4 oraciones, revisar
-                    # Contar oraciones sustanciales (más de 5 palabras)
-                    substantial_sentences = [s for s in sentences if len(s.split()) > 5]
-                    short_sentences = [s for s in sentences if len(s.split()) <= 5]
-                    
-                    # Si hay muchas oraciones cortas vs sustanciales, posible error
-                    if len(short_sentences) > len(substantial_sentences) and len(short_sentences) > 2:
-                        # Tomar solo las primeras 2-3 oraciones sustanciales
-                        if substantial_sentences:
-                            translated = '. '.join(substantial_sentences[:3])
-                    if not translated.endswith(('.', '!', '?')):
-                            translated += '.'
-                            print(f"🧹 Trimmed excessive short sentences")
-                
-                # ✅ DETECTAR Y ELIMINAR "NOTA:" O "NOTE:" AL FINAL ESPECÍFICAMENTE
-                # Eliminar patrones específicos de notas al final de la traducción
-                note_patterns_at_end = [
-                    r'\s*NOTA\s*[:.].*$',  # NOTA: o NOTA. al final
-                    r'\s*NOTE\s*[:.].*$',  # NOTE: o NOTE. al final
-                    r'\s*Nota\s*[:.].*$',  # Nota: o Nota. al final
-                    r'\s*Note\s*[:.].*$',  # Note: o Note. al final
-                    r'\s*NOTES\s*[:.].*$', # NOTES: o NOTES. al final
-                    r'\s*Notes\s*[:.].*$', # Notes: o Notes. al final
-                    r'\s*NOTAS\s*[:.].*$', # NOTAS: o NOTAS. al final
-                    r'\s*Notas\s*[:.].*$', # Notas: o Notas. al final
-                    r'\s*\(NOTA\).*$',     # (NOTA) al final
-                    r'\s*\(NOTE\).*$',     # (NOTE) al final
-                    r'\s*\(Nota\).*$',     # (Nota) al final
-                    r'\s*\(Note\).*$',     # (Note) al final
-                ]
-                
-                for pattern in note_patterns_at_end:
-                    before_cleanup = translated
-                    translated = re.sub(pattern, '', translated, flags=re.IGNORECASE).strip()
-                    if before_cleanup != translated:
-                        print(f"🧹 Removed NOTE pattern at end: '{before_cleanup[len(translated):].strip()}'")
-                        break  # Solo eliminar el primer patrón encontrado
-                
-                # Final cleanup
-                translated = translated.strip(' "\'`.,:-*()[]{}')
+                translated = self._clean_translation(response)
                 
-                # ✅ AGREGAR PUNTO FINAL SI ES NECESARIO
-                if len(translated) > 10 and not translated.endswith(('.', '!', '?', ':')):
-                    translated += '.'
-                
-                postprocess_time = time.time() - postprocess_start_time
+                postprocess_time = (time.perf_counter_ns() - postprocess_start_ns) / 1e9
                 
                 # Enhanced validation
-                if not translated or len(translated) < 2:
-                    total_time = time.time() - start_time
-                    print(f"⚠️  Translation too short: '{translated}' (Total: {total_time:.2f}s)")
-                    if config.ENABLE_DEBUG_LOGGING:
-                        print(f"Translation too short: '{translated}'")
-                    return f"[{target_language.upper()}] {text}"
-                
-                # ✅ VALIDACIÓN MEJORADA PARA DETECTAR TRADUCCIONES SIN SENTIDO
-                if self._is_nonsensical_translation(translated, text):
-                    total_time = time.time() - start_time
-                    print(f"⚠️  Nonsensical translation detected: '{translated}' (Total: {total_time:.2f}s)")
-                    return f"[{target_language.upper()}] {text}"
-                
-                # Don't return if it's exactly the same as input (unless it's a proper noun or very short)
-                if (translated.lower().strip() == text.lower().strip() and 
-                    len(text.split()) > 1 and 
-                    not text[0].isupper()):  # Allow proper nouns to remain the same
-                    total_time = time.time() - start_time
-                    print(f"⚠️  Translation same as original: '{translated}' (Total: {total_time:.2f}s)")
-                    if config.ENABLE_DEBUG_LOGGING:
-                        print(f"Translation same as original: '{translated}'")
-                    return f"[{target_language.upper()}] {text}"
+                rejection = self._rejection_reason(translated, text)
+                if rejection:
+                    total_time = (time.perf_counter_ns() - start_ns) / 1e9
+                    print(f"⚠️  {rejection}: '{translated}' (Total: {total_time:.2f}s)")
+                    return _fallback_prefix(target_language) + text
                 
                 # Calculate final timing and statistics
-                total_time = time.time() - start_time
-                self.translation_times.append(total_time)
+                total_ns = time.perf_counter_ns() - start_ns
+                total_time = total_ns / 1e9
+                self.translation_times.append(total_ns)
                 self.total_translations += 1
                 self.total_characters_translated += len(text)
                 
-                # Calculate statistics
-                avg_time = sum(self.translation_times) / len(self.translation_times)
-                chars_per_second = len(text) / total_time if total_time > 0 else 0
+                # Enhanced timing logs with GPU info and context info (solo si se piden)
+                if config.ENABLE_TIMING_LOGGING:
+                    # Calculate statistics
+                    avg_time = self.translation_times.mean() / 1e9
+                    chars_per_second = len(text) / total_time if total_time > 0 else 0
+                    
+                    context_marker = " (+context)" if previous_text else ""
+                    print(f"✅ Translation complete{context_marker}: '{translated[:50]}{'...' if len(translated) > 50 else ''}'")
+                    print(f"⏱️  Timing - Prompt: {prompt_time:.3f}s | Generation: {generation_time:.3f}s | Post-proc: {postprocess_time:.3f}s | Total: {total_time:.2f}s")
+                    print(f"🔧 Device: {self.device} | Performance: {chars_per_second:.1f} chars/sec")
+                    print(f"📈 Stats - Avg: {avg_time:.2f}s | Count: {self.total_translations} | Total chars: {self.total_characters_translated}")
                 
-                # Enhanced timing logs with GPU info and context info
-                context_marker = " (+context)" if previous_text else ""
-                print(f"✅ Translation complete{context_marker}: '{translated[:50]}{'...' if len(translated) > 50 else ''}'")
-                print(f"⏱️  Timing - Prompt: {prompt_time:.3f}s | Generation: {generation_time:.3f}s | Post-proc: {postprocess_time:.3f}s | Total: {total_time:.2f}s")
-                print(f"🔧 Device: {self.device} | Performance: {chars_per_second:.1f} chars/sec")
-                print(f"📈 Stats - Avg: {avg_time:.2f}s | Count: {self.total_translations} | Total chars: {self.total_characters_translated}")
+                logger.debug("Final translation: '%s' -> '%s'", text, translated)
                 
-                if config.ENABLE_DEBUG_LOGGING:
-                    print(f"Final translation: '{text}' -> '{translated}'")
+                # Solo se guardan traducciones válidas de textos cortos (acota la memoria de la caché)
+                if len(text) <= _TRANSLATION_CACHE_MAX_CHARS:
+                    self._translation_cache[cache_key] = translated
+                    if len(self._translation_cache) > _TRANSLATION_CACHE_SIZE:
+                        self._translation_cache.popitem(last=False)
                 
                 return translated
                 
             except Exception as gen_error:
-                total_time = time.time() - start_time
+                total_time = (time.perf_counter_ns() - start_ns) / 1e9
                 print(f"❌ Generation error after {total_time:.2f}s on {self.device}: {gen_error}")
-                if config.ENABLE_DEBUG_LOGGING:
-                    print(f"Generation error: {gen_error}")
-                return f"[{target_language.upper()}] {text}"
+                logger.debug("Generation error: %s", gen_error)
+                return _fallback_prefix(target_language) + text
                 
         except Exception as e:
-            total_time = time.time() - start_time if 'start_time' in locals() else 0
+            total_time = (time.perf_counter_ns() - start_ns) / 1e9 if 'start_ns' in locals() else 0
             print(f"❌ Translation error after {total_time:.2f}s: {e}")
-            if config.ENABLE_DEBUG_LOGGING:
-                print(f"Translation error: {e}")
-            return f"[{target_language.upper()}] {text}"
+            logger.debug("Translation error: %s", e)
+            return _fallback_prefix(target_language) + text
         
         finally:
             # Optimize GPU memory after each translation if enabled
             if hasattr(config, 'MLX_CACHE_OPTIMIZATION') and config.MLX_CACHE_OPTIMIZATION:
-                if self.total_translations % 10 == 0:  # Clear cache every 10 translations
+                # Solo vaciar la caché de MLX cuando ha crecido de verdad: vaciarla por contador bloquea
+                # la GPU y obliga a reservar de nuevo los buffers en la siguiente traducción
+                if self.get_gpu_performance_info()["cache_memory_mb"] > _CACHE_CLEAR_THRESHOLD_MB:
                     self.optimize_gpu_memory()
 
+    def _clean_translation(self, response):
+        """Strip model artifacts, AI explanations and notes from a raw model response"""
+        # Enhanced cleanup for context-aware translations
+        # Remove common end tokens and artifacts (cortar en el primero que aparezca)
+        # El corte se busca sobre la respuesta original: recorte y strip generan una sola copia
+        match = _END_TOKEN_RE.search(response)
+        translated = (response[:match.start()] if match else response).strip()
+        
+        # ✅ FAST PATH: sin ningún marcador sospechoso no hay explicaciones, prompts ni notas que limpiar
+        # (los pasos siguientes solo eliminan texto, así que no pueden crear marcadores nuevos)
+        suspicious = _SUSPICIOUS_RE.search(translated) is not None
+        
+        # ✅ DETECTAR Y REMOVER EXPLICACIONES DE IA
+        # Buscar y remover explicaciones al final (desde la primera que aparezca)
+        match = _EXPLANATION_RE.search(translated) if suspicious else None
+        if match:
+            translated = translated[:match.start()].strip()
+            logger.debug("🧹 Removed AI explanation: '%s...'", match.group()[:30])
+        
+        # ✅ DETECTAR Y LIMPIAR REPETICIONES EXCESIVAS MEJORADO
+        # Detectar repeticiones de signos de puntuación
+        # (una sola pasada con subn; hace falta un mínimo de 11 caracteres para que haya repetición)
+        if len(translated) > 10:
+            translated, removed = _PUNCT_REPETITION_RE.subn(r'\1', translated)
+            if removed:
+                logger.debug("🧹 Removed excessive punctuation repetition")
+        
+        # Detectar repeticiones de palabras/frases
+        match = _WORD_REPETITION_RE.search(translated)
+        if match:
+            # Tomar solo la primera ocurrencia antes de la repetición
+            translated = translated[:match.start()].strip()
+            logger.debug("🧹 Removed excessive word repetition pattern")
+        
+        # Remove training artifacts and prompts that sometimes leak through
+        match = _LEAKED_PROMPT_RE.search(translated) if suspicious else None
+        if match:
+            translated = translated[:match.start()].strip()
+        
+        # Language-specific cleanup - remove prompt markers
+        if translated.startswith(_LANG_MARKERS):
+            for marker in _LANG_MARKERS:
+                # removeprefix devuelve el mismo objeto si el marcador no está al principio
+                without_marker = translated.removeprefix(marker)
+                if without_marker is not translated:
+                    translated = without_marker.strip()
+                    break
+        
+        # Remove quotes if the entire translation is wrapped in them
+        if translated and translated[0] in ('"', "'") and translated[-1] == translated[0]:
+            translated = translated[1:-1].strip()
+        
+        # ✅ MANEJO MEJORADO DE ORACIONES MÚLTIPLES - MENOS AGRESIVO
+        # Solo cortar si hay evidencia clara de que es un error (muchas oraciones muy cortas)
+        # Más de 4 oraciones necesita al menos 4 signos de fin de oración: si no los hay, no se divide
+        if translated.count('.') + translated.count('!') + translated.count('?') >= 4:
+            sentences = _SENTENCE_SPLIT_RE.split(translated)
+        else:
+            sentences = ()
+        if len(sentences) > 4:  # Más de 4 oraciones, revisar
+            # Contar oraciones sustanciales (más de 5 palabras) y cortas en una sola pasada
+            substantial_sentences = []
+            short_count = 0
+            for sentence in sentences:
+                if len(sentence.split()) > 5:
+                    substantial_sentences.append(sentence)
+                else:
+                    short_count += 1
+        
+            # Si hay muchas oraciones cortas vs sustanciales, posible error
+            trimmed = False
+            if short_count > len(substantial_sentences) and short_count > 2:
+                # Tomar solo las primeras 2-3 oraciones sustanciales
+                if substantial_sentences:
+                    translated = '. '.join(substantial_sentences[:3])
+                    trimmed = True
+            # El punto final solo hace falta si se han unido oraciones recortadas
+            if trimmed:
+                if translated[-1] not in '.!?':
+                    translated += '.'
+                logger.debug("🧹 Trimmed excessive short sentences")
+        
+        # ✅ DETECTAR Y ELIMINAR "NOTA:" O "NOTE:" AL FINAL ESPECÍFICAMENTE
+        # Eliminar patrones específicos de notas al final de la traducción
+        match = _NOTE_END_RE.search(translated) if suspicious else None
+        if match:
+            translated = translated[:match.start()].strip()
+            logger.debug("🧹 Removed NOTE pattern at end: '%s'", match.group().strip())
+        
+        # Final cleanup
+        translated = translated.strip(_TRAILING_STRIP)
+        
+        # ✅ AGREGAR PUNTO FINAL SI ES NECESARIO
+        if len(translated) > 10 and translated[-1] not in '.!?:':
+            translated += '.'
+        
+        return translated
+        
+    def translate_batch(self, texts, target_language="es", previous_texts=None, batch_size=None):
+        """Translate several texts with batched generation passes of up to batch_size prompts"""
+        if previous_texts is None:
+            previous_texts = [None] * len(texts)
+        if batch_size is None:
+            batch_size = config.TRANSLATION_BATCH_SIZE
+        
+        # Sin generación por lotes disponible, traducir uno a uno
+        if batch_generate is None or self.translation_model is None:
+            return [self.translate_text(text, target_language, previous_text)
+                    for text, previous_text in zip(texts, previous_texts)]
+        
+        results = [""] * len(texts)
+        pending = [i for i, text in enumerate(texts) if text.strip()]
+        if not pending:
+            return results
+        
+        start_ns = time.perf_counter_ns()
+        target_language = sys.intern(target_language)
+        target_lang_name = _LANGUAGE_NAMES.get(target_language, target_language.capitalize())
+        print(f"🌐 Starting batch translation of {len(pending)} texts -> {target_language.upper()}")
+        
+        try:
+            prompt_tokens = []
+            max_tokens = []
+            for i in pending:
+                source_lang = _detect_source_language(texts[i])
+                prompt = _build_context_prompt(source_lang, target_language, texts[i], previous_texts[i],
+                                               _LANGUAGE_NAMES.get(source_lang, "unknown language"),
+                                               target_lang_name)
+                prompt_tokens.append(self.translation_tokenizer.encode(prompt))
+                max_tokens.append(min(200, _approx_word_count(texts[i]) * 8))
+            
+            # Un batch_generate por grupo: acota la memoria de la caché KV con listas largas
+            responses = []
+            step = max(1, batch_size)
+            for batch_start in range(0, len(prompt_tokens), step):
+                batch_end = batch_start + step
+                responses.extend(batch_generate(
+                    self.translation_model,
+                    self.translation_tokenizer,
+                    prompt_tokens[batch_start:batch_end],
+                    max_tokens=max_tokens[batch_start:batch_end],
+                    verbose=False
+                ).texts)
+        except Exception as e:
+            total_time = (time.perf_counter_ns() - start_ns) / 1e9
+            print(f"❌ Batch generation error after {total_time:.2f}s on {self.device}: {e}")
+            for i in pending:
+                results[i] = _fallback_prefix(target_language) + texts[i]
+            return results
+        
+        for i, response in zip(pending, responses):
+            text = texts[i]
+            translated = self._clean_translation(response)
+            rejection = self._rejection_reason(translated, text)
+            if rejection:
+                print(f"⚠️  {rejection}: '{translated}'")
+                results[i] = _fallback_prefix(target_language) + text
+                continue
+            
+            results[i] = translated
+            self.total_translations += 1
+            self.total_characters_translated += len(text)
+        
+        # El tiempo del lote se reparte por igual entre sus textos en las estadísticas
+        total_ns = time.perf_counter_ns() - start_ns
+        for _ in pending:
+            self.translation_times.append(total_ns // len(pending))
+        print(f"✅ Batch translation complete: {len(pending)} texts in {total_ns / 1e9:.2f}s")
+        
+        return results
+        
     def translate_with_context(self, text, target_language="es", use_auto_context=False):
         """Translate text with automatic context from previous translations"""
         
@@ -809,15 +859,16 @@ Translation to {target_lang_name}:"""
             
             # ✅ SER MÁS CONSERVADOR CON EL CONTEXTO
             # Solo usar contexto si es muy relevante y no muy largo
-            if len(previous_text.split()) > 2 and len(previous_text.split()) < 15:
+            previous_split = previous_text.split()
+            if 2 < len(previous_split) < 15:
                 # Verificar que el contexto anterior sea del mismo idioma aproximadamente
-                current_words = set(text.lower().split()[:5])  # Primeras 5 palabras
-                previous_words = set(previous_text.lower().split()[:5])  # Primeras 5 palabras
+                # (solo se pasan a minúsculas las primeras 5 palabras, no los textos completos)
+                current_words = {word.lower() for word in text.split(maxsplit=5)[:5]}  # Primeras 5 palabras
+                previous_words = {word.lower() for word in previous_split[:5]}  # Primeras 5 palabras
                 
                 # Solo usar contexto si hay alguna palabra en común (mismo tema)
                 if current_words & previous_words:  # Intersección no vacía
-                    if config.ENABLE_DEBUG_LOGGING:
-                        print(f"📝 Using automatic context: '{previous_text[:30]}...'")
+                    logger.debug("📝 Using automatic context: '%s...'", previous_text[:30])
                 else:
                     previous_text = None  # No usar contexto si no hay relación
             else:
@@ -840,7 +891,9 @@ Translation to {target_lang_name}:"""
     
     def get_translation_history(self, limit=5):
         """Get recent translation history"""
-        recent_history = list(self.translation_history)[-limit:]
+        # Recorrer solo las últimas `limit` entradas en lugar de copiar todo el historial
+        recent_history = list(itertools.islice(reversed(self.translation_history), limit))
+        recent_history.reverse()
         return recent_history
     
     def clear_translation_history(self):
@@ -848,6 +901,59 @@ Translation to {target_lang_name}:"""
         self.translation_history.clear()
         print("🗑️  Translation history cleared")
 
+    def _get_prefix_cache(self, prefix):
+        """Return (prompt_cache, prefix_tokens) with the prefix already prefilled, or None"""
+        if prefix in self._prompt_caches:
+            return self._prompt_caches[prefix]
+        
+        entry = None
+        if make_prompt_cache is not None:
+            try:
+                prompt_cache = make_prompt_cache(self.translation_model)
+                if can_trim_prompt_cache(prompt_cache):
+                    prefix_tokens = self.translation_tokenizer.encode(prefix)
+                    self.translation_model(mx.array(prefix_tokens)[None], cache=prompt_cache)
+                    mx.eval([c.state for c in prompt_cache])
+                    entry = (prompt_cache, len(prefix_tokens))
+                    logger.debug("🔧 Cached instruction prefix (%d tokens)", len(prefix_tokens))
+            except Exception as e:
+                logger.debug("Prompt cache not available: %s", e)
+        
+        self._prompt_caches[prefix] = entry
+        return entry
+        
+    def _generate_translation(self, prompt, max_tokens):
+        """Generate a translation reusing the KV cache of the static instruction prefix when possible"""
+        # El prompt empieza siempre por el bloque de instrucciones, fijo por idioma de destino;
+        # el contexto y el texto a traducir van detrás
+        prefix_end = prompt.find("\n\n") + 2
+        cache_entry = self._get_prefix_cache(prompt[:prefix_end])
+        
+        if cache_entry is None:
+            return generate(
+                self.translation_model,
+                self.translation_tokenizer,
+                prompt=prompt,
+                max_tokens=max_tokens,
+                verbose=False
+            )
+        
+        # Solo se hace prefill del texto que cambia en cada llamada
+        prompt_cache, prefix_tokens = cache_entry
+        suffix_tokens = self.translation_tokenizer.encode(prompt[prefix_end:], add_special_tokens=False)
+        try:
+            return generate(
+                self.translation_model,
+                self.translation_tokenizer,
+                prompt=suffix_tokens,
+                max_tokens=max_tokens,
+                verbose=False,
+                prompt_cache=prompt_cache
+            )
+        finally:
+            # Devolver la caché al estado "solo prefijo" para la siguiente traducción
+            trim_prompt_cache(prompt_cache, prompt_cache[0].offset - prefix_tokens)
+    
     def get_gpu_performance_info(self):
         """Get current GPU performance and memory information"""
         try:
@@ -875,34 +981,41 @@ Translation to {target_lang_name}:"""
                 
             return device_info
         except Exception as e:
-            if config.ENABLE_DEBUG_LOGGING:
-                print(f"Error getting GPU info: {e}")
+            logger.debug("Error getting GPU info: %s", e)
             return {"device": str(self.device), "peak_memory_mb": 0, "cache_memory_mb": 0, "is_gpu": True}
     
     def optimize_gpu_memory(self):
         """Optimize GPU memory usage by clearing caches"""
         try:
             mx.clear_cache()
-            if config.ENABLE_DEBUG_LOGGING:
-                print("🔧 MLX cache cleared for memory optimization")
+            logger.debug("🔧 MLX cache cleared for memory optimization")
         except Exception as e:
-            if config.ENABLE_DEBUG_LOGGING:
-                print(f"Error clearing MLX cache: {e}") 
+            logger.debug("Error clearing MLX cache: %s", e)
 
+    def _rejection_reason(self, translated, text):
+        """Return why a cleaned translation must be discarded, or None if it is usable"""
+        # Enhanced validation
+        if not translated or len(translated) < 2:
+            return "Translation too short"
+        
+        # ✅ VALIDACIÓN MEJORADA PARA DETECTAR TRADUCCIONES SIN SENTIDO
+        if self._is_nonsensical_translation(translated, text):
+            return "Nonsensical translation detected"
+        
+        # Don't return if it's exactly the same as input (unless it's a proper noun or very short)
+        if (translated.lower().strip() == text.lower().strip() and 
+            _MULTI_WORD_RE.search(text) and 
+            not text[0].isupper()):  # Allow proper nouns to remain the same
+            return "Translation same as original"
+        
+        return None
+        
     def _is_nonsensical_translation(self, translation, original):
         # ✅ VALIDACIÓN MEJORADA PARA DETECTAR TRADUCCIONES SIN SENTIDO
         
         # Detectar mezclas de idiomas obvias
-        mixed_language_patterns = [
-            r"c'è\s+la\s+",  # Italiano mezclado con otro idioma
-            r"\w+\s+la\s+armi",  # Patrones específicos sin sentido
-            r"[а-я]+\s+[a-z]+\s+[а-я]+",  # Cirílico mezclado
-            r"[一-龯]\s+[a-z]+\s+[一-龯]",  # Chino mezclado
-        ]
-        
-        for pattern in mixed_language_patterns:
-            if re.search(pattern, translation.lower()):
-                return True
+        if _MIXED_LANGUAGE_RE.search(translation):
+            return True
         
         # ✅ VALIDACIÓN MEJORADA DE LONGITUD - ser menos estricto
         original_words = len(original.split())
@@ -915,7 +1028,7 @@ Translation to {target_lang_name}:"""
             return True
         
         # Detectar si solo hay puntuación o símbolos
-        clean_translation = re.sub(r'[^\w\s]', '', translation).strip()
+        clean_translation = _NONWORD_RE.sub('', translation).strip()
         if len(clean_translation) < 2:
             return True
         
@@ -11,20 +11,103 @@ Copyright (c) 2025 Kiko Cisneros
 Licensed under the MIT License (see LICENSE file for details)
 """
 
+import re
+import time
+from collections import deque
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
 from . import config
 
 
+# Table view rows; only the rows that fit in the viewport are kept in the Treeview
+_TABLE_ROW_HEIGHT = 60
+_TABLE_HEADING_HEIGHT = 30
+
+# Tcl lambda inserting a flat list of (index, iid, values, tag) rows into a Treeview
+_TREE_INSERT_LAMBDA = """{tree rows} {
+    foreach {index iid values tag} $rows {
+        $tree insert {} $index -id $iid -values $values -tags [list $tag]
+    }
+}"""
+
+# Auto-refresh: poll for new entries, backing off while renders are slow, and
+# debounce the render so a burst of entries is drawn once
+_POLL_INTERVAL_MS = 500
+_SLOW_POLL_INTERVAL_MS = 2000
+_SLOW_RENDER_MS = 50
+_REFRESH_DEBOUNCE_MS = 200
+
+# Table cells are wrapped to this width in a single regex scan: each match is a
+# line of up to the width ending before whitespace, or one longer word on its own
+_TABLE_WRAP_WIDTH = 45
+_WRAP_RE = re.compile(r'\S(?:.{0,%d}\S)?(?=\s|$)|\S+' % (_TABLE_WRAP_WIDTH - 2))
+
+# The text views keep only the most recent entries; "Show older" extends the tail
+_MAX_TAIL = 500
+
+# Hover colors of the history toolbar palette
+_HOVER_COLORS = {
+    "#66BB6A": "#81C784",  # Light Green
+    "#FF6B6B": "#FF8A80",  # Light Red
+    "#4FC3F7": "#81D4FA",  # Light Blue
+    "#BA68C8": "#CE93D8",  # Light Purple
+    "#90A4AE": "#B0BEC5",  # Light Blue Grey
+    "#B0BEC5": "#CFD8DC",  # Lighter Grey
+    "#757575": "#9E9E9E",  # Light Grey
+    "#4CAF50": "#66BB6A",  # Green (original)
+    "#2196F3": "#42A5F5",  # Blue (original)
+    "#FF9800": "#FFB74D",  # Orange (original)
+    "#607D8B": "#78909C",  # Blue Grey (original)
+    "#F44336": "#EF5350"   # Red (original)
+}
+
+# Lightened hover color per base color, for the main window buttons
+_LIGHTEN_CACHE = {}
+
+# Audio device dropdown labels per device list
+_DEVICE_LABELS_CACHE = {}
+
+# Table tooltips: pointer motion is hit-tested at most once per interval
+_TOOLTIP_THROTTLE_MS = 80
+
+# Empty-state contents of the history views
+_EMPTY_TREE = ("", "", "No transcriptions yet.", "Start recording to see your transcriptions here!")
+_EMPTY_TRANSCRIPTIONS = "No transcriptions yet.\nStart recording to see your transcriptions here!"
+_EMPTY_TRANSLATIONS = "No translations yet.\nStart recording to see your translations here!"
+
+# Notebook tab indices of the history views
+_TABLE_VIEW = 0
+_TRANSCRIPTION_VIEW = 1
+_TRANSLATION_VIEW = 2
+
+
 class HistoryWindow:
     """Separate window for viewing transcription history"""
     
+    # Separator between entries in the text views
+    _SEP = "─" * 60 + "\n\n"
+    
     def __init__(self, history_manager):
         self.history_manager = history_manager
         self.window = None
         self.last_entry_count = 0
         self.auto_refresh_active = False
+        self._window_start = 0  # First entry index rendered in the table
+        self._window_size = 0   # Number of entries rendered in the table
+        self._derived = {}      # Entry index -> (time, languages), formatted once
+        self._last_render_ms = 0.0
+        self._refresh_after_id = None
+        self._next_check_id = None
+        self._dirty = set()     # Views to repopulate when their tab is selected
+        self._stale = False     # Entries arrived while the window was hidden
+        self._session_start = None  # History session shown by the last full rebuild
+        self._last_was_empty = False  # The last full rebuild drew the empty state
+        self._last_stats_text = None
+        self._wrap_cache = {}   # Entry index -> wrapped (original, translation) table cells
+        self._button_styles = set()  # ttk styles registered for the toolbar buttons
+        self._text_tail = _MAX_TAIL  # Entries shown in the text views
+        # Line count of each entry block currently in the text views, oldest first
+        self._text_lines = {_TRANSCRIPTION_VIEW: deque(), _TRANSLATION_VIEW: deque()}
         
     def show(self):
         """Show the history window"""
@@ -34,6 +117,13 @@ class HistoryWindow:
             return
             
         self.window = tk.Toplevel()
+        # New widgets, nothing drawn yet
+        self._window_start = self._window_size = 0
+        self._dirty = set()
+        for line_counts in self._text_lines.values():
+            line_counts.clear()
+        self._last_was_empty = False
+        self._last_stats_text = None
         self.window.title("Transcription History")
         self.window.geometry("1000x600")
         self.window.configure(bg='white')
@@ -57,6 +147,8 @@ class HistoryWindow:
         
         self.create_modern_button(toolbar, "🔄 Refresh", self.refresh_history,
                                 bg="#607D8B", fg="black").pack(side=tk.LEFT, padx=2, pady=2)
+        self.create_modern_button(toolbar, "⏫ Show older", self.show_older,
+                                bg="#90A4AE", fg="black").pack(side=tk.LEFT, padx=2, pady=2)
         self.create_modern_button(toolbar, "🗑️ Clear All", self.clear_history,
                                 bg="#F44336", fg="black").pack(side=tk.LEFT, padx=2, pady=2)
         
@@ -65,6 +157,7 @@ class HistoryWindow:
         auto_refresh_check = tk.Checkbutton(toolbar, text="Auto-refresh", variable=self.auto_refresh_var,
                                           bg='lightgray', fg='black', font=('Arial', 9))
         auto_refresh_check.pack(side=tk.LEFT, padx=10)
+        self.auto_refresh_var.trace_add('write', self._on_auto_toggle)
         
         # Stats
         stats_frame = tk.Frame(toolbar, bg='lightgray')
@@ -92,6 +185,7 @@ class HistoryWindow:
         self.setup_table_view()
         self.setup_transcription_view()
         self.setup_translation_view()
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
         
         self.refresh_history()
         self.start_auto_refresh()
@@ -114,19 +208,26 @@ class HistoryWindow:
         self.tree.column('transcription', width=350, minwidth=250, anchor='w')
         self.tree.column('translation', width=350, minwidth=250, anchor='w')
         
-        # Scrollbars for table
-        v_scrollbar_table = ttk.Scrollbar(self.table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        # Scrollbars for table; the vertical one scrolls over the whole history,
+        # not over the few rows actually present in the Treeview
+        self.tree_scrollbar = ttk.Scrollbar(self.table_frame, orient=tk.VERTICAL, command=self._on_table_scroll)
         h_scrollbar_table = ttk.Scrollbar(self.table_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar_table.set, xscrollcommand=h_scrollbar_table.set)
+        self.tree.configure(xscrollcommand=h_scrollbar_table.set)
         
         # Pack treeview and scrollbars
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        v_scrollbar_table.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         h_scrollbar_table.pack(side=tk.BOTTOM, fill=tk.X)
         
+        # Re-render the visible rows on resize and scroll the window with the wheel
+        self.tree.bind('<Configure>', self._on_table_resize)
+        self.tree.bind('<MouseWheel>', self._on_table_wheel)
+        self.tree.bind('<Button-4>', self._on_table_wheel)
+        self.tree.bind('<Button-5>', self._on_table_wheel)
+        
         # Style the treeview with larger row height to accommodate longer text
         style = ttk.Style()
-        style.configure("Treeview", font=('Arial', 10), rowheight=60)  # Increased row height
+        style.configure("Treeview", font=('Arial', 10), rowheight=_TABLE_ROW_HEIGHT)  # Increased row height
         style.configure("Treeview.Heading", font=('Arial', 10, 'bold'))
         
         # Alternating row colors
@@ -136,35 +237,148 @@ class HistoryWindow:
         # Add tooltip functionality for long text
         self.create_tooltip_bindings()
     
+    def _visible_rows(self):
+        """Number of table rows that fit in the Treeview viewport"""
+        height = self.tree.winfo_height()
+        if height <= 1:  # Not mapped yet, use the configured height
+            return int(self.tree.cget('height'))
+        return max(1, (height - _TABLE_HEADING_HEIGHT) // _TABLE_ROW_HEIGHT)
+    
+    def _table_row(self, index):
+        """Treeview values and tag for the entry at index"""
+        timestamp, lang_info = self._entry_header(index)
+        
+        # Apply text wrapping for better display in table cells; entries never
+        # change once added, so each one is wrapped only once
+        wrapped = self._wrap_cache.get(index)
+        if wrapped is None:
+            history = self.history_manager
+            wrapped = self._wrap_cache[index] = (self.wrap_text_for_table(history.originals[index]),
+                                                 self.wrap_text_for_table(history.translateds[index]))
+        original_text, translated_text = wrapped
+        
+        tag = 'evenrow' if index % 2 else 'oddrow'
+        return (timestamp, lang_info, original_text, translated_text), tag
+    
+    def _ensure_window(self, first, patch=False):
+        """Render only the table rows visible from entry index first.
+        
+        Rows that scrolled out are deleted and rows that scrolled in are
+        inserted, so the Treeview never holds more than one screen of entries.
+        With patch, the rows that stay are updated in place instead of kept as is.
+        """
+        total = len(self.history_manager.entries)
+        visible = self._visible_rows()
+        first = max(0, min(first, total - visible))
+        end = min(total, first + visible)
+        old_start = self._window_start
+        old_end = old_start + self._window_size
+        
+        if not self._window_size and end > first:
+            # Only the empty-state row can be there, drop it in a single Tcl call
+            self.tree.delete(*self.tree.get_children())
+        
+        scrolled_out = [f"e{i}" for i in range(old_start, old_end) if i < first or i >= end]
+        if scrolled_out:
+            self.tree.delete(*scrolled_out)
+        if patch:
+            for i in range(max(first, old_start), min(end, old_end)):
+                values, tag = self._table_row(i)
+                self.tree.item(f"e{i}", values=values, tags=(tag,))
+        
+        # Rows above the kept ones go to the top (newest first), rows below to the end.
+        # All of them are inserted by one Tcl call; the rows travel as a Tcl list,
+        # so cell text needs no quoting
+        rows = []
+        for i in reversed(range(first, min(end, old_start))):
+            values, tag = self._table_row(i)
+            rows += (0, f"e{i}", values, tag)
+        for i in range(max(first, old_end), end):
+            values, tag = self._table_row(i)
+            rows += ('end', f"e{i}", values, tag)
+        if rows:
+            self.tree.tk.call('apply', _TREE_INSERT_LAMBDA, str(self.tree), tuple(rows))
+        
+        self._window_start = first
+        self._window_size = end - first
+        
+        # The scrollbar thumb reflects the position within the full history
+        if total:
+            self.tree_scrollbar.set(first / total, end / total)
+        else:
+            self.tree_scrollbar.set(0, 1)
+    
+    def _on_table_scroll(self, *args):
+        """Scrollbar command: move the rendered window over the history"""
+        if args[0] == 'moveto':
+            first = int(float(args[1]) * len(self.history_manager.entries))
+        else:  # ('scroll', count, 'units' | 'pages')
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self._visible_rows()
+            first = self._window_start + step
+        self._ensure_window(first)
+    
+    def _on_table_resize(self, event):
+        """Re-render the window for the new viewport height, staying pinned to the newest row"""
+        at_end = self._window_start + self._window_size >= len(self.history_manager.entries)
+        self._ensure_window(len(self.history_manager.entries) if at_end else self._window_start)
+    
+    def _on_table_wheel(self, event):
+        """Scroll the rendered window one row per wheel step"""
+        step = -1 if event.num == 4 or event.delta > 0 else 1
+        self._on_table_scroll('scroll', step, 'units')
+        return "break"  # The Treeview itself never scrolls
+    
     def create_tooltip_bindings(self):
         """Add tooltip functionality to show full text on hover"""
-        def show_tooltip(event):
-            # Get the item under cursor
-            item = self.tree.identify('item', event.x, event.y)
-            if item:
-                # Get the column
-                column = self.tree.identify('column', event.x, event.y)
-                if column in ['#3', '#4']:  # transcription or translation columns
-                    values = self.tree.item(item, 'values')
-                    if column == '#3' and len(values) > 2:
-                        text = values[2]  # transcription
-                    elif column == '#4' and len(values) > 3:
-                        text = values[3]  # translation
-                    else:
-                        return
-                    
-                    # Show tooltip if text is long
-                    if len(text) > 50:
-                        self.create_tooltip(event.x_root, event.y_root, text)
+        def on_motion(event):
+            # Only record the pointer here; the hit-test runs at most once per
+            # throttle interval instead of on every pixel of movement
+            self._motion_pos = (event.x, event.y, event.x_root, event.y_root)
+            if self._motion_after_id is None:
+                self._motion_after_id = self.window.after(_TOOLTIP_THROTTLE_MS, self._motion_tick)
         
         def hide_tooltip(event):
+            if self._motion_after_id is not None:
+                self.window.after_cancel(self._motion_after_id)
+                self._motion_after_id = None
+            self._last_hover_cell = None
             if hasattr(self, 'tooltip_window') and self.tooltip_window:
                 self.tooltip_window.destroy()
                 self.tooltip_window = None
         
-        self.tree.bind('<Motion>', show_tooltip)
+        self.tree.bind('<Motion>', on_motion)
         self.tree.bind('<Leave>', hide_tooltip)
         self.tooltip_window = None
+        self._motion_after_id = None
+        self._motion_pos = None
+        self._last_hover_cell = None
+    
+    def _motion_tick(self):
+        """Show the tooltip for the cell under the last recorded pointer position"""
+        self._motion_after_id = None
+        x, y, x_root, y_root = self._motion_pos
+        
+        # Get the item and column under cursor; nothing to do within the same cell
+        item = self.tree.identify('item', x, y)
+        column = self.tree.identify('column', x, y) if item else ''
+        if (item, column) == self._last_hover_cell:
+            return
+        self._last_hover_cell = (item, column)
+        
+        if column in ['#3', '#4']:  # transcription or translation columns
+            values = self.tree.item(item, 'values')
+            if column == '#3' and len(values) > 2:
+                text = values[2]  # transcription
+            elif column == '#4' and len(values) > 3:
+                text = values[3]  # translation
+            else:
+                return
+            
+            # Show tooltip if text is long
+            if len(text) > 50:
+                self.create_tooltip(x_root, y_root, text)
     
     def create_tooltip(self, x, y, text):
         """Create a tooltip window with the full text"""
@@ -186,6 +400,7 @@ class HistoryWindow:
     
     def hide_tooltip_delayed(self):
         """Hide tooltip after delay"""
+        self._last_hover_cell = None  # Moving within the cell shows it again
         if hasattr(self, 'tooltip_window') and self.tooltip_window:
             self.tooltip_window.destroy()
             self.tooltip_window = None
@@ -227,175 +442,295 @@ class HistoryWindow:
         
     def check_for_updates(self):
         """Check for new entries and refresh if needed"""
+        self._next_check_id = None
         if self.window and self.window.winfo_exists() and self.auto_refresh_active:
+            # Polling stops while auto-refresh is off; turning it back on resumes it
+            if not self.auto_refresh_var.get():
+                return
+            
             current_count = len(self.history_manager.entries)
-            if current_count != self.last_entry_count and self.auto_refresh_var.get():
-                self.refresh_history()
-                self.last_entry_count = current_count
+            if not self.window.winfo_viewable():
+                # Withdrawn or minimized: draw nothing, catch up with one rebuild once shown
+                if current_count != self.last_entry_count or self._history_cleared():
+                    self.last_entry_count = current_count
+                    self._stale = True
+            elif self._stale or current_count != self.last_entry_count or self._history_cleared():
+                # Restart the debounce timer so a burst of entries renders once
+                if self._refresh_after_id is not None:
+                    self.window.after_cancel(self._refresh_after_id)
+                self._refresh_after_id = self.window.after(_REFRESH_DEBOUNCE_MS, self._do_refresh)
             
-            # Schedule next check
-            self.window.after(1000, self.check_for_updates)  # Check every second
+            # Schedule next check, less often while renders are slow
+            interval = _SLOW_POLL_INTERVAL_MS if self._last_render_ms > _SLOW_RENDER_MS else _POLL_INTERVAL_MS
+            self._next_check_id = self.window.after(interval, self.check_for_updates)
+    
+    def _on_auto_toggle(self, *args):
+        """Stop polling when auto-refresh is turned off and resume it when turned on"""
+        if self.auto_refresh_var.get():
+            if self._next_check_id is None:
+                self.check_for_updates()
+        elif self._next_check_id is not None:
+            self.window.after_cancel(self._next_check_id)
+            self._next_check_id = None
+    
+    def _do_refresh(self):
+        """Render the entries added since the last refresh (debounced)"""
+        self._refresh_after_id = None
+        if not (self.window and self.window.winfo_exists()):
+            return
+        
+        start = time.perf_counter()
+        current_count = len(self.history_manager.entries)
+        if self._stale or self._history_cleared():
+            self.refresh_history()
+        elif 0 < self.last_entry_count < current_count:
+            # Entries are only ever appended, render just the new ones
+            self._append_new(self.last_entry_count)
+        elif current_count != self.last_entry_count:
+            self.refresh_history()
+        self._last_render_ms = (time.perf_counter() - start) * 1000
+    
+    def _history_cleared(self):
+        """Whether the history was cleared (new session) since the last full rebuild"""
+        return self.history_manager.current_session_start != self._session_start
     
     def on_window_close(self):
         """Handle window close event"""
         self.auto_refresh_active = False
+        if self._next_check_id is not None:
+            self.window.after_cancel(self._next_check_id)
+            self._next_check_id = None
+        if self._refresh_after_id is not None:
+            self.window.after_cancel(self._refresh_after_id)
+            self._refresh_after_id = None
         self.window.destroy()
         
     def refresh_history(self):
         """Refresh the history display in all views"""
-        # Clear existing entries from all views
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.transcription_text.delete(1.0, tk.END)
-        self.translation_text.delete(1.0, tk.END)
-        
-        if not self.history_manager.entries:
-            # Empty state for all views
-            self.tree.insert('', 'end', values=("", "", "No transcriptions yet.", "Start recording to see your transcriptions here!"))
-            self.transcription_text.insert(tk.END, "No transcriptions yet.\nStart recording to see your transcriptions here!")
-            self.translation_text.insert(tk.END, "No translations yet.\nStart recording to see your translations here!")
-            self.stats_label.config(text="0 entries")
+        self._full_rebuild()
+    
+    def _full_rebuild(self):
+        """Repopulate the visible view from the whole history; the other views are rebuilt when shown"""
+        self._stale = False
+        if self._history_cleared():
+            self._derived.clear()
+            self._wrap_cache.clear()
+            self._text_tail = _MAX_TAIL
+        self._session_start = self.history_manager.current_session_start
+        
+        total_entries = len(self.history_manager.entries)
+        if not total_entries and self._last_was_empty and not self._window_size:
+            # The empty state is already on screen, nothing to redraw
+            self.last_entry_count = 0
             return
-            
-        # Update stats
+        self._last_was_empty = not total_entries
+        
+        # Update stats; the history keeps the word total, so this is O(1)
+        if total_entries:
+            self._set_stats(f"{total_entries} entries • {self.history_manager.total_words} words")
+        else:
+            self._set_stats("0 entries")
+        
+        # Only the selected tab is populated now
+        active = self._active_view()
+        self._dirty = {_TABLE_VIEW, _TRANSCRIPTION_VIEW, _TRANSLATION_VIEW}
+        self._dirty.discard(active)
+        self._rebuild_view(active, total_entries)
+        
+        self.last_entry_count = total_entries
+    
+    def _set_stats(self, text):
+        """Update the stats label, skipping the Tk call when the text is unchanged"""
+        if text != self._last_stats_text:
+            self.stats_label.config(text=text)
+            self._last_stats_text = text
+    
+    def _active_view(self):
+        """Index of the selected notebook tab"""
+        return self.notebook.index(self.notebook.select())
+    
+    def _on_tab_changed(self, event):
+        """Populate a tab that went stale while it was hidden"""
+        if self._stale or self._history_cleared():
+            self.refresh_history()
+            return
+        view = self._active_view()
+        if view in self._dirty:
+            self._dirty.discard(view)
+            self._rebuild_view(view, self.last_entry_count)
+    
+    def _rebuild_view(self, view, count):
+        """Clear and repopulate one view with the first count entries"""
+        if view == _TABLE_VIEW:
+            if not count:
+                self.tree.delete(*self.tree.get_children())
+                self._window_start = self._window_size = 0
+                self.tree.insert('', 'end', values=_EMPTY_TREE)
+                self.tree_scrollbar.set(0, 1)
+            else:
+                # Auto-scroll to bottom (most recent); rows still in the window are
+                # patched in place, keeping their selection
+                self._ensure_window(count, patch=True)
+            return
+        
+        if view == _TRANSCRIPTION_VIEW:
+            text_widget = self.transcription_text
+            empty_text = _EMPTY_TRANSCRIPTIONS
+        else:
+            text_widget = self.translation_text
+            empty_text = _EMPTY_TRANSLATIONS
+        
+        text_widget.delete(1.0, tk.END)
+        self._text_lines[view].clear()
+        if not count:
+            text_widget.insert(tk.END, empty_text)
+            return
+        # Only the most recent entries; newer ones are left to the next _append_new
+        start = max(0, count - self._text_tail)
+        for i, text in enumerate(self._text_column(view)[start:count], start + 1):
+            self._insert_text_entry(view, i, text)
+        text_widget.see(tk.END)
+    
+    def _append_new(self, since_index):
+        """Add the entries after since_index to the visible view without rebuilding it"""
         total_entries = len(self.history_manager.entries)
-        total_words = sum(len(entry['original_text'].split()) + len(entry['translated_text'].split()) 
-                         for entry in self.history_manager.entries)
-        self.stats_label.config(text=f"{total_entries} entries • {total_words} words")
-        
-        # Populate all views
-        for i, entry in enumerate(self.history_manager.entries, 1):
-            timestamp = datetime.fromisoformat(entry['timestamp']).strftime('%H:%M:%S')
-            lang_info = f"{entry['source_language']} → {entry['target_language']}"
-            
-            # Table view (now shows full text without truncation)
-            original_text = entry['original_text']
-            translated_text = entry['translated_text']
-            
-            # Apply text wrapping for better display in table cells
-            original_text = self.wrap_text_for_table(original_text, 45)
-            translated_text = self.wrap_text_for_table(translated_text, 45)
-            
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            self.tree.insert('', 'end', values=(timestamp, lang_info, original_text, translated_text), tags=(tag,))
+        self._set_stats(f"{total_entries} entries • {self.history_manager.total_words} words")
+        
+        # Hidden tabs are rebuilt when they are selected
+        active = self._active_view()
+        self._dirty = {_TABLE_VIEW, _TRANSCRIPTION_VIEW, _TRANSLATION_VIEW}
+        self._dirty.discard(active)
+        
+        if active == _TABLE_VIEW:
+            # Follow the newest row only if the table was already showing the end
+            if self._window_start + self._window_size >= since_index:
+                self._ensure_window(total_entries)
+            else:
+                self._ensure_window(self._window_start)
+        else:
+            for i, text in enumerate(self._text_column(active)[since_index:total_entries], since_index + 1):
+                self._insert_text_entry(active, i, text)
+            text_widget = self.transcription_text if active == _TRANSCRIPTION_VIEW else self.translation_text
             
+            # Drop the oldest blocks beyond the tail
+            line_counts = self._text_lines[active]
+            lines_to_drop = 0
+            while len(line_counts) > self._text_tail:
+                lines_to_drop += line_counts.popleft()
+            if lines_to_drop:
+                text_widget.delete('1.0', f'{lines_to_drop + 1}.0')
+            text_widget.see(tk.END)
+        
+        self.last_entry_count = total_entries
+    
+    def show_older(self):
+        """Extend the text views by another batch of older entries"""
+        self._text_tail += _MAX_TAIL
+        self._dirty.update((_TRANSCRIPTION_VIEW, _TRANSLATION_VIEW))
+        self._on_tab_changed(None)
+    
+    def _entry_header(self, index):
+        """Time of day and language pair of the entry at index, formatted once"""
+        header = self._derived.get(index)
+        if header is None:
+            # Read the history columns directly: timestamps are time.time_ns() integers,
+            # so the time of day is formatted without building or parsing ISO strings
+            history = self.history_manager
+            header = self._derived[index] = (
+                time.strftime('%H:%M:%S', time.localtime(history.timestamps[index] // 1_000_000_000)),
+                f"{history.source_langs[index]} → {history.target_langs[index]}")
+        return header
+    
+    def _text_column(self, view):
+        """History column shown by a text view"""
+        if view == _TRANSCRIPTION_VIEW:
+            return self.history_manager.originals
+        return self.history_manager.translateds
+    
+    def _insert_text_entry(self, view, number, text):
+        """Append one entry to the transcriptions or translations view"""
+        timestamp, lang_info = self._entry_header(number - 1)
+        
+        if view == _TRANSCRIPTION_VIEW:
             # Transcriptions-only view
-            self.transcription_text.insert(tk.END, f"#{i} - {timestamp} ({lang_info})\n", "timestamp")
-            self.transcription_text.insert(tk.END, f"{entry['original_text']}\n", "transcription")
-            self.transcription_text.insert(tk.END, "─" * 60 + "\n\n", "separator")
-            
+            self.transcription_text.insert(tk.END, f"#{number} - {timestamp} ({lang_info})\n", "timestamp",
+                                           f"{text}\n", "transcription", self._SEP, "separator")
+        else:
             # Translations-only view
-            self.translation_text.insert(tk.END, f"#{i} - {timestamp} ({lang_info})\n", "timestamp")
-            self.translation_text.insert(tk.END, f"{entry['translated_text']}\n", "translation")
-            self.translation_text.insert(tk.END, "─" * 60 + "\n\n", "separator")
+            self.translation_text.insert(tk.END, f"#{number} - {timestamp} ({lang_info})\n", "timestamp",
+                                         f"{text}\n", "translation", self._SEP, "separator")
         
-        # Auto-scroll all views to bottom (most recent)
-        if self.tree.get_children():
-            last_item = self.tree.get_children()[-1]
-            self.tree.see(last_item)
-        
-        self.transcription_text.see(tk.END)
-        self.translation_text.see(tk.END)
-        
-        self.last_entry_count = len(self.history_manager.entries)
+        # Header line, the text's lines and the two separator lines
+        self._text_lines[view].append(text.count("\n") + 4)
     
     def create_modern_button(self, parent, text, command, bg="#4CAF50", fg="black", width=None):
         """Create a modern-styled button"""
-        button = tk.Button(
+        button = ttk.Button(
             parent, 
             text=text, 
             command=command,
-            bg=bg,
-            fg=fg,
-            font=('Arial', 9, 'bold'),
-            relief=tk.FLAT,
-            cursor="hand2",
-            pady=4,
-            padx=8,
-            borderwidth=0
+            style=self._button_style(bg, fg),
+            cursor="hand2"
         )
         if width:
             button.config(width=width)
         
-        # Hover effects
-        def on_enter(e):
-            button.config(bg=self.lighten_color(bg))
-        def on_leave(e):
-            button.config(bg=bg)
-            
-        button.bind("<Enter>", on_enter)
-        button.bind("<Leave>", on_leave)
-        
         return button
     
+    def _button_style(self, bg, fg):
+        """Name of the ttk button style for a color pair, registered on first use"""
+        style_name = f"Modern.{bg.lstrip('#')}.{fg.lstrip('#')}.TButton"
+        if style_name not in self._button_styles:
+            style = ttk.Style()
+            style.configure(style_name, background=bg, foreground=fg, font=('Arial', 9, 'bold'),
+                            relief=tk.FLAT, borderwidth=0, padding=(8, 4))
+            # Hover effect: Tk switches the background through the style's state
+            # map, no Python bindings run on mouse motion
+            style.map(style_name, background=[('active', self.lighten_color(bg)), ('!active', bg)])
+            self._button_styles.add(style_name)
+        return style_name
+    
     def lighten_color(self, color):
         """Lighten a hex color for hover effect"""
-        if color.startswith('#'):
-            color_map = {
-                "#66BB6A": "#81C784",  # Light Green
-                "#FF6B6B": "#FF8A80",  # Light Red
-                "#4FC3F7": "#81D4FA",  # Light Blue
-                "#BA68C8": "#CE93D8",  # Light Purple
-                "#90A4AE": "#B0BEC5",  # Light Blue Grey
-                "#B0BEC5": "#CFD8DC",  # Lighter Grey
-                "#757575": "#9E9E9E",  # Light Grey
-                "#4CAF50": "#66BB6A",  # Green (original)
-                "#2196F3": "#42A5F5",  # Blue (original)
-                "#FF9800": "#FFB74D",  # Orange (original)
-                "#607D8B": "#78909C",  # Blue Grey (original)
-                "#F44336": "#EF5350"   # Red (original)
-            }
-            return color_map.get(color, color)
-        return color
+        return _HOVER_COLORS.get(color, color)
         
     def export_txt(self):
-        self.history_manager.export_txt()
+        self.history_manager.export_txt(parent=self.window)
         self.refresh_history()
         
     def export_csv(self):
-        self.history_manager.export_csv()
+        self.history_manager.export_csv(parent=self.window)
         self.refresh_history()
         
     def export_json(self):
-        self.history_manager.export_json()
+        self.history_manager.export_json(parent=self.window)
         self.refresh_history()
         
     def clear_history(self):
         if messagebox.askyesno("Clear History", "Are you sure you want to clear all transcription history?"):
             self.history_manager.clear_history()
+            self.last_entry_count = 0
             self.refresh_history()
     
-    def wrap_text_for_table(self, text, max_length):
-        """Wrap text to fit within a specified maximum length"""
-        words = text.split()
-        wrapped_text = []
-        current_line = ""
-        
-        for word in words:
-            if len(current_line) + len(word) + 1 > max_length:
-                wrapped_text.append(current_line.strip())
-                current_line = word
-            else:
-                if current_line:
-                    current_line += " " + word
-                else:
-                    current_line = word
-        
-        if current_line:
-            wrapped_text.append(current_line.strip())
-        
-        return "\n".join(wrapped_text)
+    def wrap_text_for_table(self, text):
+        """Wrap text to fit within the table cell width"""
+        return "\n".join(_WRAP_RE.findall(text))
+
+
+def _lighten_color(color):
+    """Lighten a hex color (memoized, the same few colors are used over and over)"""
+    lightened = _LIGHTEN_CACHE.get(color)
+    if lightened is None:
+        hex_color = color.lstrip('#')
+        rgb = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        r, g, b = (min(255, int(c * 1.2)) for c in rgb)
+        lightened = _LIGHTEN_CACHE[color] = f"#{r:02x}{g:02x}{b:02x}"
+    return lightened
 
 
 def create_modern_button(parent, text, command, bg="#4CAF50", fg="black", width=None):
     """Create a modern-styled button with hover effects"""
-    
-    def lighten_color(color):
-        """Lighten a hex color"""
-        color = color.lstrip('#')
-        rgb = tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
-        lightened = tuple(min(255, int(c * 1.2)) for c in rgb)
-        return f"#{lightened[0]:02x}{lightened[1]:02x}{lightened[2]:02x}"
+    hover_bg = _lighten_color(bg)
     
     button = tk.Button(
         parent, 
@@ -403,7 +738,7 @@ def create_modern_button(parent, text, command, bg="#4CAF50", fg="black", width=
         command=command,
         bg=bg,
         fg=fg,
-        activebackground=lighten_color(bg),
+        activebackground=hover_bg,
         activeforeground=fg,
         relief=tk.FLAT,
         font=('Arial', 9, 'bold'),
@@ -416,11 +751,12 @@ def create_modern_button(parent, text, command, bg="#4CAF50", fg="black", width=
     if width:
         button.config(width=width)
     
-    def on_enter(e):
-        button.config(bg=lighten_color(bg))
+    # Both colors are bound once here; the handlers do no color work per event
+    def on_enter(e, b=button, c=hover_bg):
+        b.config(bg=c)
     
-    def on_leave(e):
-        button.config(bg=bg)
+    def on_leave(e, b=button, c=bg):
+        b.config(bg=c)
         
     button.bind("<Enter>", on_enter)
     button.bind("<Leave>", on_leave)
@@ -428,6 +764,26 @@ def create_modern_button(parent, text, command, bg="#4CAF50", fg="black", width=
     return button 
 
 
+def _format_device(device):
+    """Compact dropdown label for an audio device"""
+    icon = '🎤' if device['is_microphone'] else '🔊' if device['is_system_audio'] else '🎧'
+    return f"{icon} {device['name'][:15]}..."  # Truncate long names
+
+
+def _device_display_names(devices):
+    """Dropdown labels for a device list, reused while the hardware is unchanged"""
+    key = tuple((device['name'], device['is_microphone'], device['is_system_audio']) for device in devices)
+    display_names = _DEVICE_LABELS_CACHE.get(key)
+    if display_names is None:
+        display_names = _DEVICE_LABELS_CACHE[key] = [_format_device(device) for device in devices]
+    return display_names
+
+
+def _display_to_name(display_names, device_names):
+    """Map dropdown labels to device names; truncated labels that collide keep the first device"""
+    return dict(zip(reversed(display_names), reversed(device_names)))
+
+
 def create_audio_device_selector(parent, audio_transcriber, on_device_change=None):
     """Create an audio device selection dropdown (compact version)"""
     frame = tk.Frame(parent, bg=parent.cget('bg'))
@@ -443,14 +799,8 @@ def create_audio_device_selector(parent, audio_transcriber, on_device_change=Non
     device_names = [device['name'] for device in devices]
     
     # Create device type indicators (more compact)
-    device_display_names = []
-    for device in devices:
-        if device['is_microphone']:
-            device_display_names.append(f"🎤 {device['name'][:15]}...")  # Truncate long names
-        elif device['is_system_audio']:
-            device_display_names.append(f"🔊 {device['name'][:15]}...")
-        else:
-            device_display_names.append(f"🎧 {device['name'][:15]}...")
+    device_display_names = _device_display_names(devices)
+    display_to_name = _display_to_name(device_display_names, device_names)
     
     # Compact dropdown
     device_var = tk.StringVar()
@@ -471,46 +821,37 @@ def create_audio_device_selector(parent, audio_transcriber, on_device_change=Non
     
     def on_device_selected(event=None):
         """Handle device selection"""
-        selected_display = device_var.get()
-        
-        # Find the actual device name
-        for i, display_name in enumerate(device_display_names):
-            if display_name == selected_display:
-                actual_device_name = device_names[i]
-                audio_transcriber.set_audio_device(actual_device_name)
-                
-                if on_device_change:
-                    on_device_change(actual_device_name)
-                break
+        actual_device_name = display_to_name.get(device_var.get())
+        if actual_device_name is not None:
+            audio_transcriber.set_audio_device(actual_device_name)
+            
+            if on_device_change:
+                on_device_change(actual_device_name)
     
     device_dropdown.bind('<<ComboboxSelected>>', on_device_selected)
     
     # Compact refresh button
     def refresh_devices():
         """Refresh the device list"""
-        nonlocal devices, device_names, device_display_names
+        nonlocal devices, device_names, device_display_names, display_to_name
         
         devices = audio_transcriber.get_audio_devices()
         device_names = [device['name'] for device in devices]
-        
-        device_display_names = []
-        for device in devices:
-            if device['is_microphone']:
-                device_display_names.append(f"🎤 {device['name'][:15]}...")
-            elif device['is_system_audio']:
-                device_display_names.append(f"🔊 {device['name'][:15]}...")
-            else:
-                device_display_names.append(f"🎧 {device['name'][:15]}...")
+        device_display_names = _device_display_names(devices)
+        display_to_name = _display_to_name(device_display_names, device_names)
         
         device_dropdown['values'] = device_display_names
         
-        # Try to maintain current selection or select first device
+        # Try to maintain current selection or select first device; the variable
+        # is only written when the label changes, so its traces stay quiet
         current_device = audio_transcriber.selected_device
         if current_device in device_names:
             idx = device_names.index(current_device)
-            device_var.set(device_display_names[idx])
+            if device_var.get() != device_display_names[idx]:
+                device_var.set(device_display_names[idx])
         elif device_display_names:
-            device_var.set(device_display_names[0])
+            if device_var.get() != device_display_names[0]:
+                device_var.set(device_display_names[0])
             on_device_selected()  # Auto-select first device
     
     refresh_btn = tk.Button(frame, text="🔄", command=refresh_devices,